@@ -7,91 +7,89 @@ zID: 5184128
 Date created: 18/05/2018
 '''
 
-from Search import Search
-from collections import defaultdict
+import heapq
+from Search import Search, SearchResult
 
 class AStar(Search):
 
-    # No path can be longer than this
-    MAXSTEPS = 10000
-
     def __init__(self, game_map):
         super().__init__(game_map)
 
     '''
-    This function carries out A* search using the Manhattan distance as the
-    heuristic for determining which game states to explore first, the
+    This function carries out A* search, by default using the Manhattan distance
+    to the nearest goal as the heuristic for determining which game states to
+    explore first, it returns the same (path, game_state) as the BFS, the
     optional parameters include
-    goal_coords: the goal location (is required)
+    goal_coords: a collection of goal coords (is required), the path ends at
+        the first one reached
     start_pos: is the start position if none supplied will use current position
     cross_divide: is search allowed to cross between land -> water or the reverse
     prev_state: when simulating chained goals this is the initial state, if none
         then use current player state
+    waste_trees: can trees be cut down when a raft is already held
+    use_stones: it is okay to use stones
+    heuristic: function taking a position and returning an estimate of the number
+        of moves left to reach a goal, it must never overestimate or the path
+        may not be optimal
+    max_nodes, deadline: a budget on the search, the same as for the BFS
     '''
-    def perform_a_star_search(self, goal_coords, start_pos=None, cross_divide=False, prev_state=None, waste_trees=False):
-        game_state = self._setup_game_state(cross_divide, prev_state, waste_trees)
+    def perform_a_star_search(self, goal_coords, start_pos=None, cross_divide=False, prev_state=None,
+                              waste_trees=False, use_stones=False, heuristic=None,
+                              max_nodes=None, deadline=None):
+        game_state = self._setup_game_state(cross_divide, prev_state, waste_trees, use_stones)
         if start_pos is None:
-            player_pos = self.player.get_position()
-            start_pos = (player_pos[0], player_pos[1])
+            start_pos = self.player.get_position()
+        start_pos = (start_pos[0], start_pos[1])
+        if isinstance(goal_coords, (list, tuple)):
+            goal_coords = set(goal_coords)
+        if heuristic is None:
+            heuristic = self._manhattan_heuristic(goal_coords)
 
         # Because game_state is so relevant to solvability of the problem it is
         # included with the current position to make up the overall state, so two
         # different states at the same position count separately
-        start_state = start_pos + tuple(game_state)
+        start_node = self._pack_node(start_pos, game_state)
+        # g_score is path length to reach each node
+        g_score = {start_node: 0}
+        came_from = {start_node: None}
         closed_set = set()
-        open_set = {start_state}
-        came_from = dict()
-
-        # g_score is path length at that state, default to maxsteps
-        g_score = defaultdict(lambda: self.MAXSTEPS)
-        g_score[start_state] = 0
-
-        # h_score is herusitic score at that statem default to maxsteps
-        h_score = defaultdict(lambda: self.MAXSTEPS)
-        h_score[start_state] = self._manhattan_distance(start_pos, goal_coords)
+        # The open set is a heap of (f_score, h_score, node), f_score being the
+        # g_score + h_score, ties go to the node closest to the goal, nodes may be
+        # pushed more than once and the outdated entries are skipped when popped
+        h = heuristic(start_pos)
+        open_set = [(h, h, start_node)]
 
-        while len(open_set):
-            # Find the state in open_set with lowest overall g_score + h_score
-            current = min(open_set, key=lambda x: g_score[x] + h_score[x])
-            current_pos = current[:2:]
-            game_state = list(current)[2::]
-            # Reached the goal so find path used to get there
-            if current_pos == goal_coords:
-                return self._reconstruct_path(came_from, current), game_state
-
-            open_set.remove(current)
+        bounded = max_nodes is not None or deadline is not None
+        expanded = 0
+        self.searches_run += 1
+        while open_set:
+            if bounded and self._out_of_budget(expanded, max_nodes, deadline):
+                return self._partial_result(came_from, goal_coords)
+            f, h, current = heapq.heappop(open_set)
+            if current in closed_set:
+                continue
             closed_set.add(current)
+            expanded += 1
+            self.nodes_expanded += 1
+            current_pos, game_state = self._unpack_node(current)
+            new_g_score = g_score[current] + 1
 
-            # Find possible new moves and check if they are valid/worthwhile moves
-            directions = self._new_directions([current_pos])
-            for direction in directions:
+            for direction in self.player.DIRECTIONS.values():
                 new_pos = (current_pos[0] + direction[0], current_pos[1] + direction[1])
-                new_game_state = list(game_state)
-                if not self._valid_move(current_pos, new_pos, new_game_state):
-                    continue
-                new_state = new_pos + tuple(new_game_state)
-                if new_state in closed_set:
+                # Same as the BFS the goal only needs to be next to the path, as the
+                # heuristic is at least 1 for anything that isn't a goal the first
+                # goal found this way is still the closest
+                if new_pos in goal_coords:
+                    return SearchResult(self._trace_path(came_from, current) + [new_pos], game_state, False)
+                new_game_state = self._valid_move(current_pos, new_pos, game_state)
+                if new_game_state == self.INVALID:
                     continue
-                if new_state not in open_set:
-                    open_set.add(new_state)
-
+                new_node = self._pack_node(new_pos, new_game_state)
                 # If a more direct path already found then don't try this
-                tentative_g_score = g_score[current] + 1
-                if tentative_g_score >= g_score[new_state]:
+                if new_node in closed_set or new_g_score >= g_score.get(new_node, new_g_score + 1):
                     continue
-                # If it all checks out then add new state
-                came_from[new_state] = current
-                g_score[new_state] = tentative_g_score
-                h_score[new_state] = g_score[new_state] + self._manhattan_distance(new_pos, goal_coords)
+                came_from[new_node] = current
+                g_score[new_node] = new_g_score
+                h = heuristic(new_pos)
+                heapq.heappush(open_set, (new_g_score + h, h, new_node))
         return None
-
-    '''
-    Once the goal has been found this is used to find out what path was used
-    to get to that goal state
-    '''
-    def _reconstruct_path(self, came_from, current):
-        total_path = [(current[0], current[1])]
-        while current in came_from:
-            current = came_from[current]
-            total_path.append((current[0], current[1]))
-        return list(reversed(total_path))
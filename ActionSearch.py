@@ -0,0 +1,136 @@
+'''
+ActionSearch.py
+Contains the ActionSearch class which extends the Search class and implements
+A* over positions and facings, where the cost of a path is the number of
+actions needed to follow it (turns, moving forward, cutting and unlocking)
+rather than the number of tiles, so the path found is the one that needs the
+fewest actions to be sent to the server
+Date created: 18/10/2026
+'''
+
+import heapq
+import itertools
+from Search import Search, SearchResult
+
+class ActionSearch(Search):
+
+    # Facings in the order of Player.DIRECTIONS, turning right adds one
+    FACINGS = ('N', 'E', 'S', 'W')
+    # Tiles that need an action to be used on them before moving on to them
+    TOOL_TILES = (ord('T'), ord('-'))
+    # The game_state bits of a key, what is left is the position and facing
+    STATE_MASK = -1 << (Search.NODE_SHIFT + 2)
+
+    def __init__(self, game_map):
+        super().__init__(game_map)
+        self.directions = [self.player.DIRECTIONS[facing] for facing in self.FACINGS]
+        # Number of turns to go from one facing to another
+        self.turns = [[min((new - old) % 4, (old - new) % 4) for new in range(4)] for old in range(4)]
+
+    '''
+    This function carries out the search, it returns the same (path, game_state)
+    as the A* search and takes the same parameters, with the addition of
+    facing: the facing at the start position, if none supplied will use the
+        current player facing
+    The heuristic should estimate the number of tiles left to a goal, which is
+    never more than the number of actions so the path is still optimal
+    '''
+    def perform_action_search(self, goal_coords, start_pos=None, facing=None, cross_divide=False,
+                              prev_state=None, waste_trees=False, use_stones=False, heuristic=None,
+                              max_nodes=None, deadline=None):
+        game_state = self._setup_game_state(cross_divide, prev_state, waste_trees, use_stones)
+        if start_pos is None:
+            start_pos = self.player.get_position()
+        if facing is None:
+            facing = self.player.get_facing()
+        start_pos = (start_pos[0], start_pos[1])
+        if isinstance(goal_coords, (list, tuple)):
+            goal_coords = set(goal_coords)
+        if heuristic is None:
+            heuristic = self._manhattan_heuristic(goal_coords)
+        tiles = self.game_map.map
+
+        # Each key is a search node with the facing in the lowest 2 bits
+        start_key = self._pack_node(start_pos, game_state) << 2 | self.FACINGS.index(facing)
+        g_score = {start_key: 0}
+        came_from = {start_key: None}
+        # The (game_state, g_score) pairs each position and facing has been
+        # reached with, a state dominated by one reached for no more actions
+        # can't lead to a better path so isn't pushed
+        states = {start_key & ~self.STATE_MASK: [(game_state, 0)]}
+        closed_set = set()
+        # The open set is a heap of (f_score, h_score, key, count, goal), goal
+        # is only set for the entries that finish a path by moving on to a goal,
+        # those are pushed with their full cost so the first one popped is the
+        # best, count goes up with every entry so goal is never compared
+        counter = itertools.count()
+        h = heuristic(start_pos)
+        open_set = [(h, h, start_key, next(counter), None)]
+
+        bounded = max_nodes is not None or deadline is not None
+        expanded = 0
+        self.searches_run += 1
+        while open_set:
+            if bounded and self._out_of_budget(expanded, max_nodes, deadline):
+                key = min(came_from, key=lambda key: heuristic(self._unpack_node(key >> 2)[0]))
+                return SearchResult(self._trace_actions(came_from, key), self._unpack_node(key >> 2)[1], True)
+            f, h, current, _, goal = heapq.heappop(open_set)
+            if goal is not None:
+                return SearchResult(self._trace_actions(came_from, current) + [goal],
+                                    self._unpack_node(current >> 2)[1], False)
+            if current in closed_set:
+                continue
+            closed_set.add(current)
+            expanded += 1
+            self.nodes_expanded += 1
+            current_pos, game_state = self._unpack_node(current >> 2)
+            turns = self.turns[current & 3]
+            g = g_score[current]
+
+            for new_facing, direction in enumerate(self.directions):
+                new_pos = (current_pos[0] + direction[0], current_pos[1] + direction[1])
+                # Turning, then using a tool if needed, then moving forward
+                cost = g + turns[new_facing] + 1
+                if tiles.get_code(new_pos[0], new_pos[1]) in self.TOOL_TILES and \
+                        new_pos not in self._loc_sets[game_state >> self.LOC_SHIFT]:
+                    cost += 1
+                # Same as A* the goal only needs to be next to the path
+                if new_pos in goal_coords:
+                    heapq.heappush(open_set, (cost, 0, current, next(counter), new_pos))
+                    continue
+                new_game_state = self._valid_move(current_pos, new_pos, game_state)
+                if new_game_state == self.INVALID:
+                    continue
+                new_key = self._pack_node(new_pos, new_game_state) << 2 | new_facing
+                if new_key in closed_set or cost >= g_score.get(new_key, cost + 1):
+                    continue
+                pos_states = states.setdefault(new_key & ~self.STATE_MASK, [])
+                if any(reached <= cost and self._dominates(state, new_game_state) for state, reached in pos_states):
+                    continue
+                pos_states.append((new_game_state, cost))
+                came_from[new_key] = current
+                g_score[new_key] = cost
+                h = heuristic(new_pos)
+                heapq.heappush(open_set, (cost + h, h, new_key, next(counter), None))
+        return None
+
+    '''
+    Rebuild the path to a key by following the links to the key it was reached
+    from, the same as _trace_path but with the facing taken off
+    '''
+    def _trace_actions(self, came_from, key):
+        path = []
+        while key is not None:
+            path.append(self._unpack_node(key >> 2)[0])
+            key = came_from[key]
+        path.reverse()
+        return path
+
+    '''
+    The facing after the last move of a path, or None if it has no moves
+    '''
+    def final_facing(self, path):
+        if len(path) < 2:
+            return None
+        direction = (path[-1][0] - path[-2][0], path[-1][1] - path[-2][1])
+        return self.FACINGS[self.directions.index(direction)]
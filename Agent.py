@@ -15,15 +15,39 @@ Basic structure:
     of player and also some additional helper functions
 - GameMap.py: contains the GameMap class which is used to store the map of the game
     world and also some additional helper functions
+- TileGrid.py: contains the TileGrid class which is the dense array used by GameMap
+    to store the tiles of the game world
+- Regions.py: contains the Regions class which is used by GameMap to keep track of
+    which walkable land is connected
+- DistanceField.py: contains the DistanceField class which is used by GameMap to
+    keep track of walking distances from the start, the gold and the player
 - Goals.py: contains the Goals class which is used to keep track of game goals
+- Instrumentation.py: contains the Instrumentation class which can be used by Goals
+    to record the time and searching done by each phase of finding a goal
 - Path.py: contains the Path class which is used to find the optimal path to a goal
+- RegionGraph.py: contains the RegionGraph class which is used by Path to plan over
+    regions of land and water when items, stones and rafts must be used in order
+- Snapshot.py: contains the Snapshot class which saves and restores what the agent
+    knows in a compact binary format, used to send the map to worker processes
+- Trace.py: contains the Trace class which records the views received and the
+    actions sent so a game can be replayed offline by Replay.py
 - Search.py: contains the Search class which is the base class used to find paths
 - Bfs.py: contains the Bfs class which extends the Search class and implements BFS
-- (No longer used)AStar.py: contains the AStar class which extends the Search class
-    and implements A*, retained for historical reasons but this is not currently
-    being used as it didn't work well when the required path was complex, the
-    heuristic directed it towards the goal but in some instances the required path
-    was to move away from the goal and collect additional items
+- IncrementalSearch.py: contains the IncrementalSearch class which extends the Search
+    class and keeps failed searches from the player between turns, repairing them
+    from the tiles that changed so Path can quickly tell that there is still no path
+- Simulator.py: contains the Simulator class which is a Python port of the game
+    engine in Tests/Step.java, used to play games headless without a server
+- ActionSearch.py: contains the ActionSearch class which extends the Search class and
+    implements A* over positions and facings with the cost being the number of actions,
+    it can be selected in Path for point to point searches
+- AStar.py: contains the AStar class which extends the Search class and implements
+    A*, it was originally retired as it didn't work well when the required path was
+    complex, the heuristic directed it towards the goal but in some instances the
+    required path was to move away from the goal and collect additional items, it
+    now uses a heap and a consistent heuristic so it is optimal and can be selected
+    in Path for point to point searches, BFS is still the default as its pruning
+    keeps searches that fail fast
 - (Removed)IdaStar.py: contains the IdaStar class which extends the Search class
     and implements IDA*, it was removed during early testing as was way too slow
     to be useful for pathfinding
@@ -32,10 +56,11 @@ Description:
 The basic control loop of the program is as follows:
 - Receive 24 bytes from the server indicating the current agent view
 - Update the internal representation of the map using this new information
-    Map is stored using a defaultdict datastructure which allows for an arbitrarily
-    sized array and initialises the default value to an empty string, the starting
-    location is set to be 100, 100 as this prevents negative/zero coordinates, which
-    may cause issues in certain circumstances
+    Map is stored in a TileGrid, a dense byte array holding the ASCII code of each
+    known tile (0 when unknown) that grows as needed so the map can be arbitrarily
+    sized, reading a position never allocates anything, the starting location is
+    set to be 100, 100 as this prevents negative/zero coordinates, which may cause
+    issues in certain circumstances
 - Keep track of if the map actually changes from what was previously known as
 this will mean that current paths may need to change
 - Keep track of known POI locations (items like key, axe, trees etc.) so that they
@@ -60,8 +85,8 @@ is a simple extra case just in case something happened to the existing path
 - The third priority is to collect POI's that have known locations, to do this:
     Start by taking the sets of known POI locations and add the relevant ones
     to a combined list of locations (relevant as in no axes when already have one)
-    Sort the list based on Manhattan distance from current location
-    Perform successive BFS until a path is found to one of the POI
+    Leave out any that can't possibly be reached (see DistanceField.py)
+    Perform a single BFS with all of them as goals so the nearest is found
     It will also try to avoice picking up stones and cutting down trees until it
     reaches the point where all land has been explored, this helps to avoid
     unwinnable situations where stones might be needed later on for example
@@ -89,11 +114,15 @@ doesn't allow for this and when I let it do this the time taken is too slow to
 be useful.
 '''
 
+import argparse
 import sys
 import socket
 from Player import Player
 from GameMap import GameMap
 from Goals import Goals
+from Path import Path
+from Instrumentation import Instrumentation
+from Trace import Trace
 
 '''
 Takes the 24 bytes received by the server and prints them in human-readable 
@@ -127,7 +156,8 @@ def get_action():
                 return char
 
 '''
-Reads next 24 bytes sent by the server into a variable and then returns
+Reads next 24 bytes sent by the server into a variable and then returns, or
+None if the server has closed the connection
 '''
 def receive_socket_data(socket):
     to_read = 24
@@ -138,10 +168,27 @@ def receive_socket_data(socket):
             bytes_read = socket.recv_into(data_view, to_read)
         except ConnectionResetError:
             return None
+        if not bytes_read:
+            return None
         data_view = data_view[bytes_read:]
         to_read -= bytes_read
     return data
 
+'''
+Update the map with the view received and use the goal/pathfinding logic to
+find the next action to take, the player is updated as if it has been taken
+'''
+def find_action(data, player, game_map, goals):
+    #print_view(data)
+    game_map.update_map(data)
+    #game_map.print_map()
+
+    #action = get_action()
+    # Goals always finds an action, falling back to a simple move if needed
+    action = goals.next_action()
+    player.player_action(action)
+    return action
+
 '''
 The main function is where program execution begins:
 - Get the command line input or exit if not found
@@ -151,13 +198,67 @@ state and find goals
 - Receive data and issue actions until the game is solved or lost
 - After receive data update map, and find what the next move should be
 using goal/pathfinding logic
+Alternatively with -i the game is played headless against the in process
+Simulator using the map file given, without any server or socket
+With -s the time and searching done by each phase of goal finding is recorded
+for every turn and written to the file given as JSON lines
+With -b the searches for each move are limited to the number of seconds given,
+if no goal is found in time a fallback move is made instead
+With -j the extended searches are run at the same time in the number of worker
+processes given
+With -a the search used to find the path to the gold and back can be chosen,
+actions finds the path needing the fewest actions rather than tiles
+With -t every view received and action sent is recorded to the file given so
+the game can be replayed offline with Replay.py
 '''
 if __name__ == '__main__':
-    if len(sys.argv) != 3:
-        print(f'python {sys.argv[0]} -p <port>')
+    parser = argparse.ArgumentParser(usage=f'python {sys.argv[0]} -p <port> | -i <map> [-m <maxmoves>] [-s <stats_file>] [-b <seconds>] [-j <workers>] [-a bfs|a_star|actions] [-t <trace_file>]')
+    parser.add_argument('-p', dest='port')
+    parser.add_argument('-i', dest='map_file')
+    parser.add_argument('-m', dest='max_moves', type=int)
+    parser.add_argument('-s', dest='stats_file')
+    parser.add_argument('-b', dest='search_budget', type=float)
+    parser.add_argument('-j', dest='workers', type=int)
+    parser.add_argument('-a', dest='point_search', choices=Path.POINT_SEARCHES, default='bfs')
+    parser.add_argument('-t', dest='trace_file')
+    args = parser.parse_args()
+    if (args.port is None) == (args.map_file is None):
+        parser.print_usage()
+        sys.exit()
+
+    player = Player()
+    game_map = GameMap(player)
+    instrumentation = Instrumentation(args.stats_file) if args.stats_file else None
+    goals = Goals(game_map, instrumentation, args.search_budget, args.workers, args.point_search)
+    trace = Trace(args.trace_file, args.point_search, args.search_budget) if args.trace_file else None
+
+    '''
+    Find the action for a view, recording both if tracing
+    '''
+    def choose_action(data):
+        action = find_action(data, player, game_map, goals)
+        if trace is not None:
+            trace.record(data, action)
+        return action
+
+    if args.map_file is not None:
+        from Simulator import Simulator
+        try:
+            simulator = Simulator(args.map_file)
+        except FileNotFoundError:
+            print(f'File Not Found: {args.map_file}')
+            sys.exit()
+        moves = simulator.play(choose_action, args.max_moves or Simulator.MAX_MOVES)
+        goals.close()
+        if instrumentation is not None:
+            instrumentation.close()
+        if trace is not None:
+            trace.close()
+        print(simulator.result(moves))
         sys.exit()
+
     try:
-        port = int(sys.argv[2])
+        port = int(args.port)
     except:
         print('Invalid port')
         sys.exit()
@@ -172,22 +273,15 @@ if __name__ == '__main__':
          print('Connection refused, check host is running')
          sys.exit()
 
-    player = Player()
-    game_map = GameMap(player)
-    goals = Goals(game_map)
     while True:
         data = receive_socket_data(socket)
         if not data:
             socket.close()
+            goals.close()
+            if instrumentation is not None:
+                instrumentation.close()
+            if trace is not None:
+                trace.close()
             sys.exit()
-        #print_view(data)
-        game_map.update_map(data)
-        #game_map.print_map()
-
-        #action = get_action()
-        action = goals.find_next_goal()
-        if not action:
-            action = goals.extended_searches()
-        player.player_action(action)
-
-        socket.send(str.encode(action))
\ No newline at end of file
+        action = choose_action(data)
+        socket.send(str.encode(action))
@@ -0,0 +1,276 @@
+#!/usr/bin/python3
+
+'''
+Benchmark.py
+Plays every map in the Tests folder with the Simulator and measures how long
+the agent takes to decide each move and how much searching it does, the report
+can be saved and used as a baseline to check later changes against
+Date created: 18/10/2026
+
+Usage:
+    python Benchmark.py [-o report.json] [-b baseline.json] [-m max_moves] [-j jobs] [--server] [-a point_search] [maps...]
+
+For each map the report records the result, the number of actions, the wall
+time of every decision (summarised as total, mean, 95th percentile and max),
+the number of searches run and search nodes expanded, and the peak memory of
+the process that played it. Each map is played in its own process so that
+the peak memory belongs to that game alone. With -j several maps are played
+at the same time, which is much faster but the decision times are less
+reliable as the games compete for the processors. With --server each game is
+played against its own copy of the Java server (Tests/Step.java) on a free
+port instead of the Simulator. With -a the search used for the path to the
+gold and back is chosen (see Path.POINT_SEARCHES).
+
+When a baseline is given each map is compared against it and any regression
+(no longer won, more actions, more nodes expanded or slower by more than the
+tolerance) is listed, the exit status is 1 if there were any so this can be
+used to gate changes.
+'''
+
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import re
+import resource
+import socket
+import subprocess
+import sys
+import time
+from Player import Player
+from GameMap import GameMap
+from Goals import Goals
+from Path import Path
+from Simulator import Simulator
+from Agent import find_action, receive_socket_data
+
+# Maps bundled with the project
+TESTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Tests')
+# Decisions faster than this in total aren't compared, they are just noise
+MIN_COMPARE_TIME = 0.05
+# Seconds to keep trying to connect while a server starts up
+SERVER_START_TIMEOUT = 10
+
+'''
+Find a port that nothing is listening on
+'''
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(('localhost', 0))
+        return s.getsockname()[1]
+
+'''
+Play a map against a Java server started for it on its own port, returns the
+number of moves and the result
+'''
+def play_on_server(map_file, choose_action, max_moves):
+    port = free_port()
+    try:
+        server = subprocess.Popen(['java', '-cp', TESTS_DIR, 'Step', '-p', str(port), '-i', map_file,
+                                   '-m', str(max_moves), '-s'], stdout=subprocess.PIPE, text=True)
+    except FileNotFoundError:
+        raise RuntimeError('Java is needed to play against the server')
+    give_up = time.monotonic() + SERVER_START_TIMEOUT
+    while True:
+        try:
+            connection = socket.create_connection(('localhost', port))
+            break
+        except ConnectionRefusedError:
+            if server.poll() is not None or time.monotonic() > give_up:
+                server.kill()
+                raise RuntimeError(f'Server for {map_file} did not start')
+            time.sleep(0.05)
+    moves = 0
+    with connection:
+        while True:
+            data = receive_socket_data(connection)
+            if not data:
+                break
+            connection.send(str.encode(choose_action(data)))
+            moves += 1
+    output = server.communicate()[0]
+    won = re.search(r'Game Won in (\d+) moves', output)
+    if won:
+        return int(won.group(1)), 'won'
+    return moves, 'lost' if 'Game Lost' in output else 'max_moves'
+
+'''
+Play a single map and measure every decision, returns a dict for the report
+'''
+def benchmark_map(map_file, max_moves=Simulator.MAX_MOVES, server=False, point_search='bfs'):
+    player = Player()
+    game_map = GameMap(player)
+    goals = Goals(game_map, point_search=point_search)
+    decision_times = []
+    actions = []
+
+    def choose_action(data):
+        start = time.perf_counter()
+        action = find_action(data, player, game_map, goals)
+        decision_times.append(time.perf_counter() - start)
+        actions.append(action)
+        return action
+
+    if server:
+        moves, result = play_on_server(map_file, choose_action, max_moves)
+    else:
+        simulator = Simulator(map_file)
+        moves = simulator.play(choose_action, max_moves)
+        result = 'won' if simulator.game_won else 'lost' if simulator.game_lost else 'max_moves'
+    ordered_times = sorted(decision_times)
+    total_time = sum(decision_times)
+    return {
+        'map': os.path.basename(map_file),
+        'result': result,
+        'moves': moves,
+        # Goals always finds an action so one is sent for every decision
+        'actions': len(actions),
+        'total_decision_time': total_time,
+        'mean_decision_time': total_time / len(decision_times) if decision_times else 0,
+        'p95_decision_time': ordered_times[int(len(ordered_times) * 0.95)] if ordered_times else 0,
+        'max_decision_time': ordered_times[-1] if ordered_times else 0,
+        'slowest_decision': decision_times.index(ordered_times[-1]) + 1 if ordered_times else 0,
+        'searches_run': goals.path.searches_run(),
+        'nodes_expanded': goals.path.nodes_expanded(),
+        'cache_hits': goals.path.cache_hits(),
+        'fallback_moves': goals.fallback_moves,
+        # ru_maxrss is in kilobytes on Linux
+        'peak_memory_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+'''
+Play each map in a new process, by default one at a time so the timings don't
+interfere, jobs is the number of maps to play at the same time
+'''
+def run_benchmark(map_files, max_moves=Simulator.MAX_MOVES, jobs=1, server=False, point_search='bfs'):
+    results = []
+    start = time.perf_counter()
+    with multiprocessing.Pool(jobs, maxtasksperchild=1) as pool:
+        # Results come back in the order of the maps so the output is the same
+        # whatever the number of jobs
+        for result in pool.imap(_benchmark_map, [(map_file, max_moves, server, point_search)
+                                                  for map_file in map_files]):
+            print(format_result(result), file=sys.stderr)
+            results.append(result)
+    total_time = sum(result['total_decision_time'] for result in results)
+    total_moves = sum(result['moves'] for result in results)
+    return {
+        'maps': results,
+        'won': sum(1 for result in results if result['result'] == 'won'),
+        'success_rate': sum(1 for result in results if result['result'] == 'won') / len(results) if results else 0,
+        'total_decision_time': total_time,
+        'mean_decision_time': total_time / total_moves if total_moves else 0,
+        'total_actions': sum(result['actions'] for result in results),
+        'total_nodes_expanded': sum(result['nodes_expanded'] for result in results),
+        'wall_time': time.perf_counter() - start,
+        'jobs': jobs,
+    }
+
+'''
+Pool.imap only passes a single argument
+'''
+def _benchmark_map(args):
+    return benchmark_map(*args)
+
+'''
+One line human readable summary of a whole report
+'''
+def format_summary(report):
+    return f"{report['won']}/{len(report['maps'])} won ({report['success_rate']:.0%}), " \
+           f"{report['total_actions']} actions, {report['mean_decision_time'] * 1000:.2f}ms per move, " \
+           f"{report['wall_time']:.1f}s with {report['jobs']} jobs"
+
+'''
+One line human readable summary of a map result
+'''
+def format_result(result):
+    return f"{result['map']:12} {result['result']:9} {result['actions']:6} actions " \
+           f"{result['total_decision_time']:8.3f}s total {result['max_decision_time']:7.3f}s max " \
+           f"{result['nodes_expanded']:10} nodes {result['peak_memory_kb'] // 1024:5}MB"
+
+'''
+Compare a report against a baseline report, returns a list of regressions
+'''
+def compare_reports(report, baseline, tolerance):
+    regressions = []
+    baseline_maps = {result['map']: result for result in baseline['maps']}
+    for result in report['maps']:
+        name = result['map']
+        old = baseline_maps.get(name)
+        if old is None:
+            continue
+        if old['result'] == 'won' and result['result'] != 'won':
+            regressions.append(f"{name}: {result['result']} but was won")
+        if result['result'] == 'won' and old['result'] == 'won' and result['actions'] > old['actions']:
+            regressions.append(f"{name}: {result['actions']} actions, was {old['actions']}")
+        if result['nodes_expanded'] > old['nodes_expanded'] * tolerance:
+            regressions.append(f"{name}: {result['nodes_expanded']} nodes expanded, was {old['nodes_expanded']}")
+        if max(result['total_decision_time'], old['total_decision_time']) >= MIN_COMPARE_TIME and \
+                result['total_decision_time'] > old['total_decision_time'] * tolerance:
+            regressions.append(f"{name}: {result['total_decision_time']:.3f}s decision time, "
+                               f"was {old['total_decision_time']:.3f}s")
+    return regressions
+
+'''
+Print a table showing the change in the main measurements for every map that
+is in both reports, followed by the totals over those maps
+'''
+def print_comparison(report, baseline, file=sys.stderr):
+    baseline_maps = {result['map']: result for result in baseline['maps']}
+    fields = ('result', 'actions', 'total_decision_time', 'nodes_expanded')
+    totals = {'old': [0, 0, 0.0, 0], 'new': [0, 0, 0.0, 0]}
+    print(f"{'map':12} {'result':>17} {'actions':>13} {'time (s)':>17} {'nodes':>21}", file=file)
+    for result in report['maps']:
+        old = baseline_maps.get(result['map'])
+        if old is None:
+            continue
+        for key, values in (('old', old), ('new', result)):
+            totals[key][0] += values['result'] == 'won'
+            for i, field in enumerate(fields[1:], 1):
+                totals[key][i] += values[field]
+        print(f"{result['map']:12} {old['result']:>8} {result['result']:>8} "
+              f"{old['actions']:>6} {result['actions']:>6} "
+              f"{old['total_decision_time']:>8.3f} {result['total_decision_time']:>8.3f} "
+              f"{old['nodes_expanded']:>10} {result['nodes_expanded']:>10}", file=file)
+    old, new = totals['old'], totals['new']
+    print(f"{'total':12} {str(old[0]) + ' won':>8} {str(new[0]) + ' won':>8} "
+          f"{old[1]:>6} {new[1]:>6} {old[2]:>8.3f} {new[2]:>8.3f} {old[3]:>10} {new[3]:>10}", file=file)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the agent on the bundled maps')
+    parser.add_argument('maps', nargs='*', help='map files to play, default is every map in Tests')
+    parser.add_argument('-o', '--output', help='file to write the JSON report to')
+    parser.add_argument('-b', '--baseline', help='JSON report to compare against')
+    parser.add_argument('-m', '--max-moves', type=int, default=Simulator.MAX_MOVES)
+    parser.add_argument('-t', '--tolerance', type=float, default=1.25,
+                        help='allowed ratio of time or nodes expanded over the baseline')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='number of maps to play at the same time')
+    parser.add_argument('--server', action='store_true', help='play against the Java server instead of the Simulator')
+    parser.add_argument('-a', '--point-search', choices=Path.POINT_SEARCHES, default='bfs',
+                        help='search used for the path to the gold and back')
+    args = parser.parse_args()
+
+    map_files = args.maps or sorted(glob.glob(os.path.join(TESTS_DIR, '*.in')))
+    try:
+        report = run_benchmark(map_files, args.max_moves, args.jobs, args.server, args.point_search)
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        sys.exit(2)
+    print(format_summary(report), file=sys.stderr)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print_comparison(report, baseline)
+        regressions = compare_reports(report, baseline, args.tolerance)
+        for regression in regressions:
+            print(f'Regression: {regression}', file=sys.stderr)
+        if regressions:
+            sys.exit(1)
@@ -9,81 +9,150 @@ zID: 5184128
 Date created: 18/05/2018
 '''
 
-from collections import deque
-from Search import Search
+from collections import deque, OrderedDict
+from Search import Search, SearchResult
 
 class Bfs(Search):
 
+    # Most search results to keep in the cache
+    CACHE_SIZE = 256
+
     def __init__(self, game_map):
         super().__init__(game_map)
+        # Results of recent searches, including those that found nothing, kept
+        # in least recently used order, see perform_bfs_search
+        self._cache = OrderedDict()
+        self.cache_hits = 0
 
     '''
     This function carries out the modified BFS, it has a number of optional parameters
     pos: is the start position if none supplied will use current position
-    goal_coords: is a list of goal coords if none supplied will look for unexplored areas
+    goal_coords: is a collection of goal coords, the first one reached is used, if
+        none supplied will look for a tile on the frontier of unexplored areas
+        (see GameMap.frontier), the first tile found right next to an unexplored
+        area is used, otherwise the first one found that is closest to one
     cross_divide: is search allowed to cross between land -> water or the reverse
         also allows for stones to be picked up/first tree to be cut down
     prev_state: when simulating chained goals this is the initial state, if none
         then use current player state
-    expand_search: if > 0 then only need to get within n tiles of the goal state
     waste_trees: can trees be cut down when a raft is already held
     get_explored: return the set containing what was explored
     use_stones: it is okay to use stones when exploring
     backtrack: it is okay to go directly back the way you came if you just picked
         up some useful item
+    max_nodes: the most nodes the search may expand
+    deadline: the time.perf_counter() value the search must stop by
+    When max_nodes or deadline is reached the search stops and returns the best
+    partial result it has (see Search._partial_result, when exploring the best
+    frontier tile found is used if there is one) flagged as truncated
+    Returns a SearchResult of (path, game_state, truncated) or None
+    The result only depends on the map, start position, starting game_state
+    and the options, so complete results are cached against the map version
+    and are reused until the map changes
     '''
     def perform_bfs_search(self, pos=None, goal_coords=None, cross_divide=False,
-                           prev_state=None, expand_search=0, waste_trees=False,
-                           get_explored=False, use_stones=False, backtrack=False):
+                           prev_state=None, waste_trees=False,
+                           get_explored=False, use_stones=False, backtrack=False,
+                           max_nodes=None, deadline=None):
         game_state = self._setup_game_state(cross_divide, prev_state, waste_trees, use_stones)
+        if pos is None:
+            pos = self.player.get_position()
+        pos = (pos[0], pos[1])
+        # Goal collections that can't be frozen, like region views, change
+        # along with the player so aren't cached
+        if get_explored or not (goal_coords is None or isinstance(goal_coords, (set, frozenset, list, tuple))):
+            return self._bfs_search(pos, goal_coords, game_state, get_explored, backtrack, max_nodes, deadline)
+        goal_key = None if goal_coords is None else frozenset(goal_coords)
+        key = (self.game_map.version, pos, game_state, goal_key, bool(backtrack))
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+            return self._cache[key]
+        result = self._bfs_search(pos, goal_coords, game_state, get_explored, backtrack, max_nodes, deadline)
+        # A search that was stopped early might have found more with longer
+        if result is None or not result.truncated:
+            self._cache[key] = result
+            if len(self._cache) > self.CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return result
+
+    '''
+    Carry out the search for perform_bfs_search, without the cache
+    '''
+    def _bfs_search(self, pos, goal_coords, game_state, get_explored, backtrack, max_nodes, deadline):
         # Minor efficiency improvement by using a deque which has fast access
         # to both ends
         queue = deque()
         explored = set()
-        explored_state = set()
-        if pos is None:
-            pos = self.player.get_position()
-        # Must store game_state along with the path otherwise item use/pickups
-        # won't be factored in to checks
-        queue.append(([(pos[0], pos[1])], game_state))
+        frontier = self.game_map.frontier
+        # Goal membership is tested for every neighbour so it should be a set
+        # lookup, other collections like region views already support this
+        if isinstance(goal_coords, (list, tuple)):
+            goal_coords = set(goal_coords)
+        # Must store game_state along with the position otherwise item use/pickups
+        # won't be factored in to checks, so the queue holds packed search nodes
+        start_node = self._pack_node(pos, game_state)
+        queue.append(start_node)
         # Keep track of where has already been explored so as not to re-explore
         # This greatly reduces number of tiles visited (only ever visit each once)
         # But it also means the path may not be the most direct
-        explored.add((pos[0], pos[1]))
-        explored_state.add((pos[0], pos[1], tuple(game_state)))
-        found = False
-        count = 0
+        # Rather than each node carrying its own path only the node it was reached
+        # from is stored, and the path is rebuilt once a goal is found
+        explored.add(pos)
+        parents = {start_node: None}
+        # The game_states each position has been reached with, a state that is
+        # dominated by one of them can't lead anywhere new so isn't queued
+        states = {pos: [game_state]}
+        # Best frontier tiles found so far as (distance, node, new_pos)
+        best_frontier = None
+        bounded = max_nodes is not None or deadline is not None
+        expanded = 0
+        truncated = False
+        self.searches_run += 1
         while len(queue):
-            path, game_state = queue.popleft()
-            directions = self._new_directions(path, backtrack and game_state[10])
-            pos = path[-1]
+            if bounded and self._out_of_budget(expanded, max_nodes, deadline):
+                truncated = True
+                break
+            expanded += 1
+            node = queue.popleft()
+            self.nodes_expanded += 1
+            pos, game_state = self._unpack_node(node)
+            parent = parents[node]
+            prev_pos = None if parent is None else self._unpack_node(parent)[0]
+            directions = self._new_directions(pos, prev_pos, backtrack and game_state & self.SHOULD_BACKTRACK)
             # Now check each of the four possible directions
-            # Add to path if not in explored and a possible move
+            # Add to queue if not in explored and a possible move
             for direction in directions:
                 new_pos = (pos[0] + direction[0], pos[1] + direction[1])
                 # If new_pos in goal_coords hopefully have shortest path to a goal
                 if not get_explored and goal_coords is not None and new_pos in goal_coords:
-                    path.append(new_pos)
-                    found = True
-                    break
-                # Check if new position is unexplored, this is the goal
-                if not get_explored and goal_coords is None and \
-                        (not expand_search or self._valid_move(pos, new_pos, game_state)) and \
-                        self.game_map.any_unexplored_nearby(new_pos, expand_search):
-                    if expand_search:
-                        path.append(new_pos)
-                    found = True
-                    break
-                new_game_state = list(game_state)
-                if self._valid_move(pos, new_pos, new_game_state):
-                    new_pos_state = (new_pos[0], new_pos[1], tuple(new_game_state))
-                    if new_pos_state not in explored_state:
-                        queue.append((path + [new_pos], new_game_state))
+                    return SearchResult(self._trace_path(parents, node) + [new_pos], game_state, False)
+                new_game_state = self._valid_move(pos, new_pos, game_state)
+                if new_game_state != self.INVALID:
+                    # Visiting a frontier tile will reveal an unexplored area
+                    if not get_explored and goal_coords is None and new_pos in frontier:
+                        distance = frontier[new_pos]
+                        if not distance:
+                            return SearchResult(self._trace_path(parents, node) + [new_pos], game_state, False)
+                        if best_frontier is None or distance < best_frontier[0]:
+                            best_frontier = (distance, node, new_pos)
+                    new_node = self._pack_node(new_pos, new_game_state)
+                    if new_node not in parents:
+                        pos_states = states.get(new_pos)
+                        if pos_states is None:
+                            states[new_pos] = [new_game_state]
+                        elif any(self._dominates(state, new_game_state) for state in pos_states):
+                            continue
+                        else:
+                            pos_states.append(new_game_state)
+                        queue.append(new_node)
                         explored.add(new_pos)
-                        explored_state.add(new_pos_state)
-
-            if found:
-                return path, game_state
+                        parents[new_node] = node
         if get_explored:
             return explored
+        if best_frontier is not None:
+            distance, node, new_pos = best_frontier
+            return SearchResult(self._trace_path(parents, node) + [new_pos], self._unpack_node(node)[1], truncated)
+        if truncated:
+            return self._partial_result(parents, goal_coords)
         return None
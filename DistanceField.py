@@ -0,0 +1,144 @@
+'''
+DistanceField.py
+Contains the DistanceField class which holds the walking distance from a source
+position to every known tile that could be reached from it, it ignores what
+is needed to cross water or get past trees and doors so the distances are
+never more than a real path would take
+Date created: 18/10/2026
+'''
+
+from collections import deque
+
+class DistanceField:
+
+    # Tiles that can never be walked on whatever is held, unknown tiles are
+    # stored as 0 and can't be walked on either
+    BLOCKED = (0, ord('*'), ord('.'), ord('d'))
+    # Larger than any real distance, used for positions that can't be reached
+    UNREACHABLE = 1 << 30
+
+    def __init__(self, tiles, source):
+        # The TileGrid the distances are measured over
+        self.tiles = tiles
+        self.source = (source[0], source[1])
+        self.passable = bytes(0 if code in self.BLOCKED else 1 for code in range(256))
+        # Distance for each cell of the grid, -1 if it can't be reached, the
+        # grid layout is kept as growing the grid moves the cells
+        self.distances = None
+        self.width = self.offset = None
+        self.dirty = True
+
+    '''
+    Flood fill out from the source over every tile that could be walked on
+    '''
+    def update(self):
+        tiles = self.tiles
+        cells, passable = tiles.cells, self.passable
+        width = tiles.width
+        distances = [-1] * len(cells)
+        self.width, self.offset = width, tiles.offset
+        self.distances = distances
+        self.dirty = False
+        start = tiles.index(self.source[0], self.source[1])
+        if start < 0:
+            return
+        # The source is always counted even if it isn't passable, so that a
+        # field from the gold or the player's own tile is never empty
+        distances[start] = 0
+        queue = deque([start])
+        # Every passable tile has a margin of stored unknown tiles around it so
+        # the neighbours can be used without bounds checks
+        steps = (-width, 1, width, -1)
+        while queue:
+            index = queue.popleft()
+            distance = distances[index] + 1
+            for step in steps:
+                neighbour = index + step
+                if distances[neighbour] < 0 and passable[cells[neighbour]]:
+                    distances[neighbour] = distance
+                    queue.append(neighbour)
+
+    '''
+    Find the index of a position in the distances, recalculating them first
+    if they are out of date, returns -1 if it isn't stored
+    '''
+    def _index(self, pos):
+        if self._out_of_date():
+            self.update()
+        return self.tiles.index(pos[0], pos[1])
+
+    '''
+    The distances need recalculating if they have been marked as out of date
+    or the grid has grown since they were calculated
+    '''
+    def _out_of_date(self):
+        tiles = self.tiles
+        return self.dirty or self.width != tiles.width or self.offset != tiles.offset or \
+            len(self.distances) != len(tiles.cells)
+
+    '''
+    The walking distance from the source to a position, or UNREACHABLE
+    '''
+    def distance(self, pos):
+        index = self._index(pos)
+        if index < 0 or self.distances[index] < 0:
+            return self.UNREACHABLE
+        return self.distances[index]
+
+    '''
+    A function giving the walking distance to the source from a position, or
+    UNREACHABLE, for use as an A* heuristic as it never overestimates, it is
+    only valid until the map next changes and positions must be stored tiles
+    '''
+    def heuristic(self):
+        if self._out_of_date():
+            self.update()
+        distances, width, offset = self.distances, self.width, self.offset
+        unreachable = self.UNREACHABLE
+
+        def distance(pos):
+            distance = distances[pos[1] * width + pos[0] - offset]
+            return unreachable if distance < 0 else distance
+        return distance
+
+    '''
+    Test if a position could be reached from the source
+    '''
+    def reachable(self, pos):
+        return self.distance(pos) != self.UNREACHABLE
+
+    '''
+    Bring the distances up to date after the tiles at the changed positions
+    have changed, tiles can only become passable as they are revealed so
+    distances only ever get shorter, which means they can be repaired by
+    spreading out from the changed tiles rather than starting again
+    '''
+    def update_cells(self, changed_cells):
+        if self._out_of_date():
+            self.dirty = True
+            return
+        tiles = self.tiles
+        cells, passable = tiles.cells, self.passable
+        distances, width, offset = self.distances, self.width, self.offset
+        steps = (-width, 1, width, -1)
+        queue = deque()
+        for x, y in changed_cells:
+            index = y * width + x - offset
+            if not passable[cells[index]]:
+                continue
+            for step in steps:
+                distance = distances[index + step] + 1
+                if distance and (distances[index] < 0 or distance < distances[index]):
+                    distances[index] = distance
+            if distances[index] >= 0:
+                queue.append(index)
+        # A tile can be improved more than once when the changed tiles are
+        # reached at different distances, but only a few tiles change at a time
+        while queue:
+            index = queue.popleft()
+            distance = distances[index] + 1
+            for step in steps:
+                neighbour = index + step
+                if passable[cells[neighbour]] and (distances[neighbour] < 0 or distance < distances[neighbour]):
+                    distances[neighbour] = distance
+                    queue.append(neighbour)
@@ -7,21 +7,38 @@ zID: 5184128
 Date created: 13/05/2018
 '''
 
-from collections import defaultdict
 import numpy as np
-from Bfs import Bfs
+from collections import deque
+from DistanceField import DistanceField
+from Regions import Regions
+from TileGrid import TileGrid
 
 class GameMap:
 
     # Depending on current facing the input data may need to be rotated to match up
     ROTATIONS = {'N': 0, 'E': 3,
                  'S': 2, 'W': 1}
+    # For each facing the index in the input data of each tile of the 5x5 view
+    # once rotated to face north, the agent's own tile is given index 24 which
+    # is just past the end of the data
+    VIEW_INDEXES = {facing: np.ascontiguousarray(np.rot90(np.insert(np.arange(24), 12, 24).reshape(5, 5), k=rotate_by))
+                    for facing, rotate_by in ROTATIONS.items()}
+    # Code of the tiles that are off the map
+    BOUNDARY = ord('.')
+    # Tiles that can be walked on without needing any tools, stones and trees
+    # aren't as a search that doesn't cross the divide can't move on to them
+    WALKABLE = {' ', 'O', '$', 'a', 'k'}
+    # How far the agent can see, any tile this close to an unexplored area will
+    # reveal it when visited
+    VIEW_RADIUS = 2
+    # Most versions of the map to remember the changed tiles of
+    CHANGE_LOG_SIZE = 256
     
     def __init__(self, player):
         # Keep a reference to player object so can access the position
         self.player = player
-        # Store game world in a defaultdict as unsure of dimensions
-        self.map = defaultdict(lambda: defaultdict(str))
+        # Store game world in a dense grid that grows as needed, as unsure of dimensions
+        self.map = TileGrid(player.get_start_position())
         # Keep track of dimensions explored
         self.max_x = self.max_y = 0
         self.min_x = self.min_y = 200
@@ -36,26 +53,81 @@ class GameMap:
         self.door_loc = set()
         self.stone_loc = set()
         self.tree_loc = set()
+        # Keep track of which walkable land is connected
+        self.regions = Regions()
+        # Known tiles within VIEW_RADIUS of an unexplored area inside the map
+        # boundaries, kept up to date so exploring doesn't need to scan, maps
+        # each tile to how close it is (0 if directly next to the area)
+        self.frontier = dict()
         # When the map updates other calculations need to be run
         self.map_updated = False
+        # The positions whose tiles changed in the last update
+        self.changed_cells = set()
+        # Whether the last update found the gold or a POI that wasn't known
+        self.poi_found = False
+        # Goes up whenever a tile or boundary changes, searches on the same
+        # version of the map will give the same results
+        self.version = 0
+        # (version, positions of the tiles that changed) for each recent version
+        # of the map, see changes_since
+        self._change_log = deque(maxlen=self.CHANGE_LOG_SIZE)
+        # Walking distance fields keyed by their source, see distance_field
+        self._distance_fields = dict()
 
     '''
-    Call after every move to keep map up to date
+    Call after every move to keep map up to date, the view is rotated to face
+    north with VIEW_INDEXES and written straight into the map, only the tiles
+    that changed are looked at individually
     '''
     def update_map(self, data):
         self.map_updated = False
+        self.changed_cells = set()
+        self.poi_found = False
         # Updates take place relative to the current position of the agent in the word
         position = self.player.get_position()
         self._update_dimensions(position)
         pos_x = position[0] - 2
         pos_y = position[1] - 2
-        view = self._rotate_view(data)
-        for i in range(5):
-            for j in range(5):
-                if not (i == 2 and j == 2):
-                    self._update_map_loc((pos_x + j, pos_y + i), view[i][j])
-                    if view[i][j] == '.':
-                        self._update_boundaries((pos_x + j, pos_y + i), j, i)
+        bounds = (self.min_bound_x, self.min_bound_y, self.max_bound_x, self.max_bound_y)
+        # The agent's own tile is never written, so it is given the unknown code
+        view = np.frombuffer(bytes(data[:24]) + b'\0', dtype=np.uint8)[self.VIEW_INDEXES[self.player.get_facing()]]
+        window = self.map.window(pos_x, pos_y, 5, 5)
+        changed = view != window
+        changed[2, 2] = False
+        if changed.any():
+            # If a tile is different from the old one then new information has
+            # been gained and old paths may be wrong
+            self.map_updated = True
+            window[changed] = view[changed]
+            tiles = self.map.TILES
+            for i, j in zip(*np.nonzero(changed)):
+                loc = (pos_x + int(j), pos_y + int(i))
+                tile = tiles[view[i, j]]
+                self.changed_cells.add(loc)
+                if self._is_walkable(tile):
+                    self.regions.add(loc)
+                self._update_poi_loc(loc, tile)
+            self._next_version(self.changed_cells)
+            for field in self._distance_fields.values():
+                field.update_cells(self.changed_cells)
+        boundaries = view == self.BOUNDARY
+        if boundaries[2].any() or boundaries[:, 2].any():
+            self._update_boundaries(boundaries, pos_x, pos_y)
+        # The tile the agent starts on is never in view, but it must be land
+        revealed = self.map_updated
+        if not self.map.get_code(position[0], position[1]):
+            revealed = True
+            self._set_tile((position[0], position[1]), '~' if self.player.on_raft else ' ')
+        # Only tiles close to the view can have stopped being next to an unexplored
+        # area, unless a boundary was found which can change tiles anywhere, and
+        # nothing can have changed if no tiles were revealed
+        if bounds != (self.min_bound_x, self.min_bound_y, self.max_bound_x, self.max_bound_y):
+            self._next_version()
+            self._update_frontier(self.min_x, self.min_y, self.max_x, self.max_y)
+        elif revealed:
+            radius = self.VIEW_RADIUS
+            self._update_frontier(pos_x - radius, pos_y - radius,
+                                  pos_x + 4 + radius, pos_y + 4 + radius)
 
     '''
     Call after every move to show the current world map based on agents knowledge
@@ -64,10 +136,8 @@ class GameMap:
     def print_map(self):
         for i in range(self.min_y, self.max_y + 1):
             for j in range(self.min_x, self.max_x + 1):
-                if self.map[i][j]:
-                    print(self.map[i][j], end='')
-                else:
-                    print('?', end='')
+                tile = self.map.get_tile(j, i)
+                print(tile if tile else '?', end='')
             print()
 
     '''
@@ -90,43 +160,139 @@ class GameMap:
         return possible_poi
 
     '''
-    Order the list of POI so the closest (Manhattan distance) is first, this
-    is largely to improve efficiency and not change the ability to find a working
-    route in the end
+    Get the walking distance field from a source position (see DistanceField),
+    fields are kept for the start, the gold and the player's position and are
+    only recalculated when a change to the map could affect them
     '''
-    def find_nearest_poi(self, pois):
-        pos = self.player.get_position()
-        ranked_poi = []
-        for loc in pois:
-            distance = abs(pos[0] - loc[0]) + abs(pos[1] - loc[1])
-            ranked_poi.append((loc[0], loc[1], distance))
-        return sorted(ranked_poi, key=lambda x: x[2])
+    def distance_field(self, source):
+        source = (source[0], source[1])
+        field = self._distance_fields.get(source)
+        if field is None:
+            position = self.player.get_position()
+            keep = (self.player.get_start_position(), self.gold_loc, (position[0], position[1]))
+            for old_source in [old_source for old_source in self._distance_fields if old_source not in keep]:
+                del self._distance_fields[old_source]
+            field = self._distance_fields[source] = DistanceField(self.map, source)
+        return field
 
     '''
-    Some times unexplored area can't be reached directly but can get close enough
-    to reveal it, this function checks for that situation
+    Test if a position could possibly be reached by the player, if not then no
+    search will find a path to it, the player can always walk back to the start
+    so this uses the field from there which rarely needs recalculating
     '''
-    def any_unexplored_nearby(self, pos, radius = 0):
-        if not radius:
-            return self.map[pos[1]][pos[0]] == '' and self._position_in_map_bounds(pos)
-        pos_x = pos[0] - radius
-        pos_y = pos[1] - radius
-        for i in range(1 + (radius * 2)):
-            for j in range(1 + (radius * 2)):
-                if self.map[pos_y + i][pos_x + j] == '' and self._position_in_map_bounds((pos_x + j, pos_y + i)):
-                    return True
+    def could_reach(self, pos):
+        return self.distance_field(self.player.get_start_position()).reachable(pos)
 
     '''
-    Update the map and check if anything has actually changed, also update
-    the location of known POI
+    Recalculate which known tiles in the rectangle from (min_x, min_y) to
+    (max_x, max_y) inclusive are on the frontier, this is done with array
+    operations over the rectangle and the tiles within VIEW_RADIUS of it
     '''
-    def _update_map_loc(self, loc, new_tile):
-        # If new tile is different from old one then new information has been
-        # gained and old paths may be wrong
-        if self.map[loc[1]][loc[0]] != new_tile:
-            self.map_updated = True
-        self.map[loc[1]][loc[0]] = new_tile
-        self._update_poi_loc(loc, new_tile)
+    def _update_frontier(self, min_x, min_y, max_x, max_y):
+        radius = self.VIEW_RADIUS
+        width = max_x - min_x + 1
+        height = max_y - min_y + 1
+        area = self.map.window(min_x - radius, min_y - radius, width + radius * 2, height + radius * 2)
+        # Unexplored tiles are unknown tiles strictly inside the known boundaries
+        xs = np.arange(min_x - radius, max_x + radius + 1)
+        ys = np.arange(min_y - radius, max_y + radius + 1)
+        unexplored = (area == 0) & ((self.min_bound_y < ys) & (ys < self.max_bound_y))[:, None] & \
+            ((self.min_bound_x < xs) & (xs < self.max_bound_x))[None, :]
+        # Whether there is an unexplored tile next to each tile of the rectangle
+        def offset(dx, dy):
+            return unexplored[radius + dy:radius + dy + height, radius + dx:radius + dx + width]
+        adjacent = offset(0, -1) | offset(1, 0) | offset(0, 1) | offset(-1, 0)
+        # Whether there is an unexplored tile within a distance in both x and y
+        # of each tile, the rows are combined first and then the columns
+        def near(distance):
+            rows = unexplored[:, radius - distance:radius - distance + width]
+            for dx in range(1 - distance, distance + 1):
+                rows = rows | unexplored[:, radius + dx:radius + dx + width]
+            tiles = rows[radius - distance:radius - distance + height]
+            for dy in range(1 - distance, distance + 1):
+                tiles = tiles | rows[radius + dy:radius + dy + height]
+            return tiles
+        near_1 = near(1)
+        near_2 = near(radius)
+        on_frontier = near_2 & (area[radius:radius + height, radius:radius + width] != 0)
+        distances = np.where(adjacent, 0, np.where(near_1, 1, 2))
+        frontier = self.frontier
+        if min_x <= self.min_x and min_y <= self.min_y and max_x >= self.max_x and max_y >= self.max_y:
+            # Every known tile is being recalculated
+            frontier.clear()
+        else:
+            for y, x in zip(*np.nonzero(~on_frontier)):
+                frontier.pop((min_x + int(x), min_y + int(y)), None)
+        for y, x in zip(*np.nonzero(on_frontier)):
+            frontier[(min_x + int(x), min_y + int(y))] = int(distances[y, x])
+
+    '''
+    Work out everything that is kept about the tiles (POI, the gold, regions
+    and the frontier) from the tiles alone, used when the tiles have been
+    loaded rather than seen (see Snapshot.py)
+    '''
+    def rebuild_from_tiles(self):
+        self.axe_loc, self.key_loc, self.door_loc = set(), set(), set()
+        self.stone_loc, self.tree_loc = set(), set()
+        self.gold_loc = None
+        self.regions = Regions()
+        self.frontier = dict()
+        self._distance_fields = dict()
+        self._change_log.clear()
+        tiles = self.map
+        for y, x in zip(*np.nonzero(tiles.grid)):
+            loc = (tiles.min_x + int(x), tiles.min_y + int(y))
+            tile = tiles.TILES[tiles.grid[y, x]]
+            if self._is_walkable(tile):
+                self.regions.add(loc)
+            self._update_poi_loc(loc, tile)
+        self._update_frontier(self.min_x, self.min_y, self.max_x, self.max_y)
+        self.poi_found = False
+
+    '''
+    Move on to a new version of the map, cells are the positions of the tiles
+    that changed, if any
+    '''
+    def _next_version(self, cells=()):
+        self.version += 1
+        self._change_log.append((self.version, frozenset(cells)))
+
+    '''
+    The positions of the tiles that have changed since an earlier version of
+    the map, or None if it was too long ago to know
+    '''
+    def changes_since(self, version):
+        log = self._change_log
+        if version == self.version:
+            return set()
+        if not log or not log[0][0] <= version + 1 <= self.version:
+            return None
+        changed = set()
+        for log_version, cells in reversed(log):
+            if log_version <= version:
+                break
+            changed |= cells
+        return changed
+
+    '''
+    Change the tile at a location, keeping the connected regions and the
+    distance fields up to date
+    '''
+    def _set_tile(self, loc, tile):
+        self._next_version((loc,))
+        self.map.set_tile(loc[0], loc[1], tile)
+        for field in self._distance_fields.values():
+            field.update_cells((loc,))
+        if self._is_walkable(tile):
+            self.regions.add(loc)
+
+    '''
+    Test if a tile can be walked on based on the tools currently held, the
+    same as the moves a search that doesn't cross the divide can make, trees
+    and stones only become walkable once cut down or picked up
+    '''
+    def _is_walkable(self, tile):
+        return tile in self.WALKABLE or (tile == '-' and self.player.have_key)
 
     '''
     Add location of POI to the appropriate set, the set data structure prevents
@@ -134,17 +300,27 @@ class GameMap:
     '''
     def _update_poi_loc(self, loc, item):
         if item == '$':
+            if self.gold_loc != loc:
+                self.poi_found = True
             self.gold_loc = loc
         elif item == 'a':
-            self.axe_loc.add(loc)
+            self._add_poi_loc(self.axe_loc, loc)
         elif item == 'k':
-            self.key_loc.add(loc)
+            self._add_poi_loc(self.key_loc, loc)
         elif item == '-':
-            self.door_loc.add(loc)
+            self._add_poi_loc(self.door_loc, loc)
         elif item == 'o':
-            self.stone_loc.add(loc)
+            self._add_poi_loc(self.stone_loc, loc)
         elif item == 'T':
-            self.tree_loc.add(loc)
+            self._add_poi_loc(self.tree_loc, loc)
+
+    '''
+    Add a location to a set of POI, noting if it is a new one
+    '''
+    def _add_poi_loc(self, poi_locs, loc):
+        if loc not in poi_locs:
+            self.poi_found = True
+            poi_locs.add(loc)
 
     '''
     Update map status based on actions taken, will also remove POI after
@@ -152,29 +328,37 @@ class GameMap:
     '''
     def update_map_after_move(self, next_step):
         new_pos = self.player.forward_coords()
-        new_tile = self.map[new_pos[1]][new_pos[0]]
+        new_tile = self.map.get_tile(new_pos[0], new_pos[1])
 
         if next_step == 'f':
+            placing_stone = new_tile == '~' and self.player.num_stones_held
             self.player.move_to_loc(new_tile)
-            if new_tile == '$':
-                self.map[new_pos[1]][new_pos[0]] = ' '
+            if placing_stone:
+                # The stone is never in view while standing on it, so record
+                # it here otherwise the position still looks like water
+                self._set_tile(new_pos, 'O')
+            elif new_tile == '$':
+                self._set_tile(new_pos, ' ')
             elif new_tile == 'a':
                 self.axe_loc.discard((new_pos[0], new_pos[1]))
-                self.map[new_pos[1]][new_pos[0]] = ' '
+                self._set_tile(new_pos, ' ')
             elif new_tile == 'k':
                 self.key_loc.discard((new_pos[0], new_pos[1]))
-                self.map[new_pos[1]][new_pos[0]] = ' '
+                self._set_tile(new_pos, ' ')
+                # Doors can now be unlocked so they join up regions
+                for loc in self.door_loc:
+                    self.regions.add(loc)
             elif new_tile == 'o':
                 self.stone_loc.discard((new_pos[0], new_pos[1]))
-                self.map[new_pos[1]][new_pos[0]] = ' '
+                self._set_tile(new_pos, ' ')
                         
         elif next_step == 'c' and new_tile == 'T':
             self.player.chop_down_tree()
             self.tree_loc.discard((new_pos[0], new_pos[1]))
-            self.map[new_pos[1]][new_pos[0]] = ' '
+            self._set_tile(new_pos, ' ')
         elif next_step == 'u' and new_tile == '-':
             self.door_loc.discard((new_pos[0], new_pos[1]))
-            self.map[new_pos[1]][new_pos[0]] = ' '
+            self._set_tile(new_pos, ' ')
 
     '''
     Used to track the maximum dimensions of the map that have been explored
@@ -187,19 +371,23 @@ class GameMap:
         self.min_y = min((self.min_y, position[1] - 2))
 
     '''
-    Used to track the boundaries of the map if they have been explored
+    Used to track the boundaries of the map if they have been explored, only
+    the row and column of the view through the agent are used, boundaries
+    marks the tiles of the view that are off the map
     '''
-    def _update_boundaries(self, position, x_rel, y_rel):
+    def _update_boundaries(self, boundaries, pos_x, pos_y):
         radius = 2
-        if x_rel > radius and (y_rel - radius) == 0:
-            self.max_bound_x = min((position[0], self.max_bound_x))
-        if x_rel < radius and (y_rel - radius) == 0:
-            self.min_bound_x = max((position[0], self.min_bound_x))
-
-        if y_rel > radius and (x_rel - radius) == 0:
-            self.max_bound_y = min((position[1], self.max_bound_y))
-        if y_rel < radius and (x_rel - radius) == 0:
-            self.min_bound_y = max((position[1], self.min_bound_y))
+        for rel in range(5):
+            if rel > radius:
+                if boundaries[radius, rel]:
+                    self.max_bound_x = min((pos_x + rel, self.max_bound_x))
+                if boundaries[rel, radius]:
+                    self.max_bound_y = min((pos_y + rel, self.max_bound_y))
+            elif rel < radius:
+                if boundaries[radius, rel]:
+                    self.min_bound_x = max((pos_x + rel, self.min_bound_x))
+                if boundaries[rel, radius]:
+                    self.min_bound_y = max((pos_y + rel, self.min_bound_y))
 
     '''
     Test if a position is within the known boundaries of the map
@@ -211,42 +399,13 @@ class GameMap:
         return False
 
     '''
-    Rotate view to face north, as the data will come from the server relative
-    to the agent's current facing
-    '''
-    def _rotate_view(self, data):
-        data = data.decode()
-        view = []
-        str_cnt = 0
-        for i in range(5):
-            view_row = []
-            for j in range(5):
-                if not (i == 2 and j == 2):
-                    view_row.append(data[str_cnt])
-                    str_cnt += 1
-                else:
-                    view_row.append('')
-            view.append(view_row)
-        rotate_by = self.ROTATIONS[self.player.get_facing()]
-        return np.rot90(np.array(view), k = rotate_by)
-
-    '''
-    Start by finding locations that are acessible, and then find traversable
-    land that isn't part of that region
+    The region connected to the player is accessible, and any other walkable
+    land is inaccessible, stones and trees aren't part of either so land past
+    them is inaccessible until they are removed, both are maintained as the map updates so this
+    doesn't need to search, accessible_region must not be modified and
+    inaccessible_region is a view that supports membership tests
     '''
     def find_unexplored_regions(self):
-        bfs = Bfs(self)
-        accessible_region = bfs.perform_bfs_search(get_explored=True)
-        inaccessible_region = set()
-        for i in range(self.min_y, self.max_y + 1):
-            for j in range(self.min_x, self.max_x + 1):
-                tile = self.map[i][j]
-                pos = (j, i)
-                if pos not in accessible_region and pos not in inaccessible_region and \
-                        (tile in [' ', 'O', 'o', '$', 'a', 'k'] or
-                        (tile == 'T' and self.player.have_axe) or
-                        (tile == '-' and self.player.have_key)):
-                    region = bfs.perform_bfs_search(pos=pos, get_explored=True)
-                    inaccessible_region = inaccessible_region.union(region)
-        return accessible_region, inaccessible_region
-
+        position = self.player.get_position()
+        pos = (position[0], position[1])
+        return self.regions.region(pos), self.regions.other_regions(pos)
@@ -6,68 +6,240 @@ zID: 5184128
 Date created: 14/05/2018
 '''
 
+import math
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
 from Path import Path
+from Snapshot import Snapshot
 
 class Goals:
 
-    def __init__(self, game_map):
+    '''
+    instrumentation: optional Instrumentation object used to record the time
+        and searching done by each phase of finding a goal, when None nothing
+        is recorded
+    search_budget: optional number of seconds the searches for each move may
+        take, once it runs out searches return the best partial path they have
+        and any goals not yet tried are skipped
+    If no goal can be found in time, or at all, a fallback move is made that
+    needs no searching (see Path.find_fallback_step) so there is always an
+    action, fallback_moves counts how many times this has happened
+    workers: optional number of processes to run the extended searches in at
+        the same time, the highest priority one to find a path is used, when
+        None they are run one after another. close must be called when done
+    point_search: the search Path uses to find the path to the gold and back,
+        one of Path.POINT_SEARCHES
+    '''
+    def __init__(self, game_map, instrumentation=None, search_budget=None, workers=None, point_search='bfs'):
         # Keep a reference to the game_map object
         self.game_map = game_map
         # Keep a reference to the player object
         self.player = game_map.player
         # Create new path object and keep reference to it
-        self.path = Path(self.game_map)
+        self.path = Path(self.game_map, point_search)
         # Winning path means can reach end goal by following the path
         self.winning_path = False
+        self.instrumentation = instrumentation
+        self.search_budget = search_budget
+        self.fallback_moves = 0
+        self.workers = workers
+        # Process pool for the extended searches and the turn counter shared
+        # with it, made when first needed
+        self._pool = None
+        self._turn = None
+
+    '''
+    Find the action to take this turn, starting with the normal goals and
+    then trying the extended searches if none of them could be reached, and
+    finally falling back to a move that needs no searching
+    '''
+    def next_action(self):
+        if self.search_budget is not None:
+            self.path.deadline = time.perf_counter() + self.search_budget
+        if self.instrumentation is None:
+            return self.find_next_goal() or self.extended_searches() or self.fallback()
+        self.instrumentation.start_turn()
+        action = self.find_next_goal() or self.extended_searches() or self.fallback()
+        self.instrumentation.end_turn(action)
+        return action
+
+    '''
+    Make a move without searching, is used when no goal could be found
+    '''
+    def fallback(self):
+        self.fallback_moves += 1
+        self._run_phase('fallback', self.path.find_fallback_step)
+        return self.path.next_step()
+
+    '''
+    Run one phase of goal finding, it is skipped if the time for this move has
+    already run out
+    '''
+    def _phase(self, name, search, *args, **kwargs):
+        if self.path.deadline is not None and time.perf_counter() >= self.path.deadline:
+            return False
+        return self._run_phase(name, search, *args, **kwargs)
+
+    '''
+    Run one phase of goal finding, recording it if instrumentation is enabled
+    '''
+    def _run_phase(self, name, search, *args, **kwargs):
+        if self.instrumentation is None:
+            return search(*args, **kwargs)
+        return self.instrumentation.record_phase(name, self.path, search, *args, **kwargs)
 
     '''
     Find the highest priority goal that is currently possible
     '''
     def find_next_goal(self):
-        # If map updated then stop current path as it may be wrong
-        if self.game_map.map_updated and not self.winning_path:
+        # If map updated then stop current path if it may be wrong, a path from
+        # a search that was stopped early is only followed for one move so that
+        # a better one can be looked for
+        if self.game_map.map_updated and not self.winning_path and not self.path.path_still_valid() \
+                or self.path.truncated:
             self.path.clear_steps()
         # If have an existing path then continue following it
         if self.path.has_steps():
             return self.path.next_step()
-        # If gold in sight then move towards it (unless already have)
+        # If gold in sight then move towards it (unless already have), there is
+        # no point searching if it can't possibly be reached yet
         gold_loc = self.game_map.gold_loc
-        if gold_loc and not self.player.have_treasure:
+        if gold_loc and not self.player.have_treasure and self.game_map.could_reach(gold_loc):
             # Will try to find a route from current position to gold then back to start
             goals = [gold_loc, self.player.get_start_position()]
-            if self.path.find_path_to_goal(goals):
-                self.winning_path = True
+            if self._phase('gold_path', self.path.find_path_to_goal, goals):
+                self.winning_path = not self.path.truncated
                 return self.path.next_step()
         # If have gold then move towards start
         if self.player.have_treasure:
-            if self.path.find_path_to_goal([self.player.get_start_position()]):
-                self.winning_path = True
+            if self._phase('return_path', self.path.find_path_to_goal, [self.player.get_start_position()]):
+                self.winning_path = not self.path.truncated
                 return self.path.next_step()
         # If there are POI's to go to that would be useful then find path to nearest
-        if self.path.find_path_to_poi():
+        if self._phase('poi', self.path.find_path_to_poi):
             return self.path.next_step()
         # Else explore (move towards an unexplored region)
-        if self.path.find_path_to_explore():
+        if self._phase('explore', self.path.find_path_to_explore):
             return self.path.next_step()
 
-    def extended_searches(self):
-        # Allow backtracking when searching for path to gold
+    '''
+    The searches to try when none of the normal goals could be reached, in
+    order of priority, as (phase name, Path method, keyword arguments, whether
+    a path found leads to the gold and back)
+    '''
+    def extended_strategies(self):
+        strategies = []
         gold_loc = self.game_map.gold_loc
         if gold_loc and not self.player.have_treasure:
-            # Will try to find a route from current position to gold then back to start
-            goals = [gold_loc, self.player.get_start_position()]
-            if self.path.find_path_to_goal(goals, backtrack=True):
-                self.winning_path = True
-                return self.path.next_step()
+            # Allow backtracking when searching for path to gold
+            if self.game_map.could_reach(gold_loc):
+                # Will try to find a route from current position to gold then back to start
+                goals = [gold_loc, self.player.get_start_position()]
+                strategies.append(('gold_path_backtrack', 'find_path_to_goal', {'goals': goals, 'backtrack': True}, True))
+            # Plan over regions of land and water for when items, stones and rafts
+            # have to be used in the right order to get the gold and get back
+            strategies.append(('region_plan', 'find_path_with_regions', {}, False))
         # Allow POI search to cross land -> water divide
-        if self.path.find_path_to_poi(cross_divide=True):
-            return self.path.next_step()
+        strategies.append(('poi_cross_divide', 'find_path_to_poi', {'cross_divide': True}, False))
         # See if using stones will lead to a useful exploration path
-        if self.player.num_stones_held and self.path.find_path_to_new_land():
-            return self.path.next_step()
+        if self.player.num_stones_held:
+            strategies.append(('new_land', 'find_path_to_new_land', {}, False))
         # Allow crossing land -> water divide
-        if self.path.find_path_to_explore(cross_divide=True):
-            return self.path.next_step()
+        strategies.append(('explore_cross_divide', 'find_path_to_explore', {'cross_divide': True}, False))
         # Also allow wasting trees
-        if self.path.find_path_to_explore(cross_divide=True, waste_trees=True):
-            return self.path.next_step()
+        strategies.append(('explore_waste_trees', 'find_path_to_explore',
+                           {'cross_divide': True, 'waste_trees': True}, False))
+        return strategies
+
+    '''
+    Try the extended searches in order of priority until one finds a path,
+    with workers they are all run at the same time instead
+    '''
+    def extended_searches(self):
+        strategies = self.extended_strategies()
+        if self.workers is not None and len(strategies) > 1:
+            strategy = self._phase('parallel_extended', self._parallel_searches, strategies)
+            if strategy:
+                if strategy[3]:
+                    self.winning_path = not self.path.truncated
+                return self.path.next_step()
+            return None
+        for name, method, kwargs, winning in strategies:
+            if self._phase(name, getattr(self.path, method), **kwargs):
+                if winning:
+                    self.winning_path = not self.path.truncated
+                return self.path.next_step()
+
+    '''
+    Run the strategies at the same time and follow the path from the highest
+    priority one that finds a path, as soon as it is known the rest are
+    cancelled. The first strategy is run in this process on the real map while
+    the rest are run in the process pool on a snapshot of it. Returns the strategy
+    that was used, or None if no path was found
+    '''
+    def _parallel_searches(self, strategies):
+        if self._pool is None:
+            self._turn = multiprocessing.Value('i', 0, lock=False)
+            self._pool = ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(self._turn,))
+        # Searches still running from an earlier move see that the turn has
+        # changed and stop
+        self._turn.value += 1
+        snapshot = Snapshot.dumps(self.game_map)
+        futures = [self._pool.submit(_run_strategy, snapshot, self._turn.value, method, kwargs, self.path.deadline,
+                                     self.path.point_search)
+                   for name, method, kwargs, winning in strategies[1:]]
+        found = None
+        name, method, kwargs, winning = strategies[0]
+        if getattr(self.path, method)(**kwargs):
+            found = strategies[0]
+        else:
+            for strategy, future in zip(strategies[1:], futures):
+                path, truncated, explore_target, searches_run, nodes_expanded = future.result()
+                self.path.worker_searches_run += searches_run
+                self.path.worker_nodes_expanded += nodes_expanded
+                if path:
+                    self.path.follow_path(path, truncated, explore_target)
+                    found = strategy
+                    break
+        self._turn.value += 1
+        for future in futures:
+            future.cancel()
+        return found
+
+    '''
+    Stop the worker processes, if any were started
+    '''
+    def close(self):
+        if self._pool is not None:
+            # Searches still running see that the turn has changed and stop,
+            # any that hadn't started were cancelled at the end of their turn
+            self._turn.value += 1
+            self._pool.shutdown()
+            self._pool = None
+
+# The turn counter shared with the parent process, set in each worker
+_turn = None
+
+'''
+Set up a worker process in the pool used by Goals
+'''
+def _init_worker(turn):
+    global _turn
+    _turn = turn
+
+'''
+Run one extended search strategy in a worker process, on the map restored
+from snapshot, the searches are stopped if the turn counter moves on from turn,
+returns (path, truncated, explore_target, searches run, nodes expanded) where
+path is None if no path was found
+'''
+def _run_strategy(snapshot, turn, method, kwargs, deadline, point_search):
+    path = Path(Snapshot(snapshot).restore(), point_search)
+    # Searches only check if they are cancelled when they have a deadline
+    path.deadline = math.inf if deadline is None else deadline
+    path.bfs.cancelled = path.a_star.cancelled = path.action_search.cancelled = path.incremental.cancelled = \
+        lambda: _turn.value != turn
+    found = getattr(path, method)(**kwargs) and _turn.value == turn
+    return path.path if found else None, path.truncated, path.explore_target, \
+        path.searches_run(), path.nodes_expanded()
@@ -0,0 +1,137 @@
+'''
+IncrementalSearch.py
+Contains the IncrementalSearch class which extends the Search class and keeps
+what a failed search from the player to some goals explored between turns, so
+when the same search is asked for again it only has to repair the part of it
+next to the tiles that have changed rather than starting from scratch
+It is only used to find out that there is no path, the path itself is still
+found by the other searches, this is the common case when the gold has been
+seen but can't be reached yet, the search for it fails again every turn until
+whatever is needed has been found
+Date created: 18/10/2026
+'''
+
+from collections import deque, OrderedDict
+from Search import Search
+
+class IncrementalSearch(Search):
+
+    # Most searches to keep, one is needed for each set of goals and starting
+    # game_state
+    CACHE_SIZE = 8
+
+    def __init__(self, game_map):
+        super().__init__(game_map)
+        # (goals, game_state) -> (map version, states, queue) in least recently
+        # used order, states maps each position reached to the game_states it
+        # was reached with, or is None if a goal was reached, queue holds the
+        # nodes still to be expanded when the deadline stopped the search so
+        # it can carry on from there next time
+        self._closures = OrderedDict()
+        # Number of times a search was answered by repairing an earlier one
+        self.repairs = 0
+
+    '''
+    Test if it is certain that none of goal_coords can be reached from the
+    player's position with the same options as the other searches (see
+    Bfs.perform_bfs_search), False means there may be a path and one of the
+    other searches has to be used to find it
+    Every position that could be reached is found with every move allowed, so
+    it is at least everything the other searches would find. Revealing tiles
+    only ever adds moves, and the moves the player has made are among those
+    found, so while the player has the same game_state the positions found
+    stay valid from wherever they are and only the ones next to changed tiles
+    need to be looked at again
+    States are pruned when another state at the same position dominates them
+    (see Search._dominates), which only holds when the other state can make
+    every move they can, otherwise goals could be missed
+    '''
+    def unreachable(self, goal_coords, cross_divide=False, waste_trees=False, use_stones=False, deadline=None):
+        game_state = self._setup_game_state(cross_divide, None, waste_trees, use_stones)
+        pos = self.player.get_position()
+        pos = (pos[0], pos[1])
+        goals = frozenset(goal_coords)
+        key = (goals, game_state)
+        closure = self._closures.get(key)
+        if closure is not None:
+            self._closures.move_to_end(key)
+            closure_version, states, queue = closure
+            if states is None:
+                # A goal was reached, revealing tiles won't change that and it
+                # is rare for the player to get stuck without their game_state
+                # changing, so the other searches are left to find out
+                return False
+            if any(self._dominates(state, game_state) for state in states.get(pos, ())):
+                changed = self.game_map.changes_since(closure_version)
+                if changed is not None:
+                    self.repairs += 1
+                    queue.extend(self._repair_queue(states, changed))
+                    return self._search(key, queue, states, goals, deadline)
+        states = {pos: [game_state]}
+        return self._search(key, deque([(pos, game_state)]), states, goals, deadline)
+
+    '''
+    The nodes that have to be expanded again after the tiles at the changed
+    positions have changed, every state reached at or next to one of them
+    '''
+    def _repair_queue(self, states, changed):
+        queue = deque()
+        directions = self.player.DIRECTIONS.values()
+        for x, y in changed:
+            for pos in [(x, y)] + [(x + direction[0], y + direction[1]) for direction in directions]:
+                queue.extend((pos, game_state) for game_state in states.get(pos, ()))
+        return queue
+
+    '''
+    Expand the nodes in the queue and everything they lead to, then keep the
+    result against key, returns True only if there is nowhere left to go
+    without a goal being reached
+    '''
+    def _search(self, key, queue, states, goals, deadline):
+        self.searches_run += 1
+        reached = self._expand(queue, states, goals, deadline)
+        if reached:
+            self._closures[key] = (self.game_map.version, None, None)
+        else:
+            # When stopped early nothing is known yet, but what was found is
+            # kept along with the nodes left to expand
+            self._closures[key] = (self.game_map.version, states, queue)
+        self._closures.move_to_end(key)
+        if len(self._closures) > self.CACHE_SIZE:
+            self._closures.popitem(last=False)
+        return reached is False
+
+    '''
+    Breadth first search from the nodes in the queue, every move is allowed
+    as the search only needs to find where can be reached, states is updated
+    with every new state, returns True as soon as a goal is next to a node,
+    False when there is nowhere left to go, or None if the deadline is reached
+    '''
+    def _expand(self, queue, states, goals, deadline):
+        directions = self.player.DIRECTIONS.values()
+        expanded = 0
+        while queue:
+            if deadline is not None and self._out_of_budget(expanded, None, deadline):
+                return None
+            expanded += 1
+            self.nodes_expanded += 1
+            pos, game_state = queue.popleft()
+            for direction in directions:
+                new_pos = (pos[0] + direction[0], pos[1] + direction[1])
+                if new_pos in goals:
+                    return True
+                new_game_state = self._valid_move(pos, new_pos, game_state)
+                if new_game_state == self.INVALID:
+                    continue
+                # Any move can be made next so there is no need to tell apart
+                # the states that should go back the way they came
+                new_game_state &= ~self.SHOULD_BACKTRACK
+                pos_states = states.get(new_pos)
+                if pos_states is None:
+                    states[new_pos] = [new_game_state]
+                elif any(self._dominates(state, new_game_state) for state in pos_states):
+                    continue
+                else:
+                    pos_states.append(new_game_state)
+                queue.append((new_pos, new_game_state))
+        return False
@@ -0,0 +1,69 @@
+'''
+Instrumentation.py
+Contains the Instrumentation class which records how long each phase of goal
+finding takes and how much searching it does, one record is made per turn and
+they can be streamed to a JSON lines file
+Date created: 18/10/2026
+'''
+
+import json
+import time
+
+class Instrumentation:
+
+    '''
+    output: a file name or file object that each turn record is written to as
+        a line of JSON, if None the records are kept in turns instead
+    '''
+    def __init__(self, output=None):
+        self._file = open(output, 'w') if isinstance(output, str) else output
+        self._owns_file = isinstance(output, str)
+        self.turns = []
+        self.turn = None
+        self.turn_count = 0
+        self._turn_start = 0
+
+    '''
+    Begin the record for a new turn
+    '''
+    def start_turn(self):
+        self.turn_count += 1
+        self.turn = {'turn': self.turn_count, 'phases': []}
+        self._turn_start = time.perf_counter()
+
+    '''
+    Run one phase of goal finding, search is called with the arguments given
+    and its result returned, the time taken, number of searches launched and
+    nodes expanded by path, and whether it succeeded and if so whether the
+    search was stopped early are recorded
+    '''
+    def record_phase(self, name, path, search, *args, **kwargs):
+        searches_run = path.searches_run()
+        nodes_expanded = path.nodes_expanded()
+        start = time.perf_counter()
+        result = search(*args, **kwargs)
+        self.turn['phases'].append({
+            'name': name,
+            'time': time.perf_counter() - start,
+            'searches': path.searches_run() - searches_run,
+            'nodes': path.nodes_expanded() - nodes_expanded,
+            'success': bool(result),
+            'truncated': bool(result) and path.truncated,
+        })
+        return result
+
+    '''
+    Finish the record for the current turn with the action chosen, it is
+    written out straight away when streaming
+    '''
+    def end_turn(self, action):
+        self.turn['action'] = action
+        self.turn['time'] = time.perf_counter() - self._turn_start
+        if self._file is not None:
+            self._file.write(json.dumps(self.turn) + '\n')
+        else:
+            self.turns.append(self.turn)
+
+    def close(self):
+        if self._owns_file:
+            self._file.close()
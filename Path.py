@@ -9,24 +9,59 @@ Date created: 14/05/2018
 
 from Bfs import Bfs
 from AStar import AStar
+from ActionSearch import ActionSearch
+from IncrementalSearch import IncrementalSearch
+from RegionGraph import RegionGraph
 
 class Path:
 
-    def __init__(self, game_map):
+    # Searches that can be used to find a path between specific points
+    POINT_SEARCHES = ('bfs', 'a_star', 'actions')
+
+    def __init__(self, game_map, point_search='bfs'):
         # Keep a reference to the game_map object
         self.game_map = game_map
         # Keep a reference to the player object
         self.player = game_map.player
         # Previously A* search was used to find specific goals like finiding the
         # path to the treasure or to a POI, but this was changed to BFS as it proved
-        # better for finding more intricate routes
-        #self.a_star = AStar(self.game_map)
+        # better for finding more intricate routes, A* is now optimal again so it
+        # can be selected for finding the path to the treasure and back, as can
+        # a search that finds the path needing the fewest actions
+        if point_search not in self.POINT_SEARCHES:
+            raise ValueError(f'Unknown point search: {point_search}')
+        self.point_search = point_search
+        self.a_star = AStar(self.game_map)
+        self.action_search = ActionSearch(self.game_map)
         # Create new Bfs object and keep reference to it
         self.bfs = Bfs(self.game_map)
+        # Used to find out quickly that searches from the player that failed
+        # on earlier turns still have no path (see IncrementalSearch.py)
+        self.incremental = IncrementalSearch(self.game_map)
         # Used to store the path as a set of coords
         self.path = []
         # Used to store the steps required to follow path
         self.steps = []
+        # Optional time.perf_counter() value that searches must stop by, when it
+        # is reached they return the best partial path they have instead
+        self.deadline = None
+        # Whether the current path came from a search that was stopped early
+        # so it may not lead all the way to the goal
+        self.truncated = False
+        # The last path that was found by a search, kept after the steps are
+        # cleared so that it can still be followed as a fallback, and the
+        # index in it of the next position to move to
+        self.last_path = []
+        self.last_path_index = 0
+        # Index in path of the next position to move to
+        self.path_index = 0
+        # When exploring the frontier tile the path leads to
+        self.explore_target = None
+        # The RegionGraph of the map, built when it is first needed
+        self.region_graph = None
+        # Searching done for this path in other processes (see Goals.py)
+        self.worker_searches_run = 0
+        self.worker_nodes_expanded = 0
 
     '''
     This function takes a list of goal positions and then performs successive BFS
@@ -38,57 +73,106 @@ class Path:
         # Start by looking for any possible path, if one is found then see if
         # there is something less destructive, this stops the path from cutting
         # down trees or crossing water when it merely saves a few steps
-        path = self._find_path_to_goal(goals, backtrack=backtrack)
+        path, truncated = self._find_path_to_goal(goals, backtrack=backtrack)
+
+        return self._update_path(path, truncated)
+
+    '''
+    Returns the path through each of the goals in turn, or None, along with
+    whether a search was stopped early, in which case the path ends where
+    that search got to
+    '''
+    def _find_path_to_goal(self, goals, cross_divide=True, waste_trees=True, backtrack=False, point_search=None):
+        point_search = point_search or self.point_search
+        if point_search == 'actions':
+            # Searching for the fewest actions takes much longer to find that
+            # there is no path, so BFS is used first to check there is one and
+            # its path is kept if the slower search can't do better in time,
+            # backtracking is allowed as the slower search never restricts it
+            bfs_path, truncated = self._find_path_to_goal(goals, cross_divide, waste_trees, True, 'bfs')
+            if not bfs_path or truncated:
+                return bfs_path, truncated
+            path, truncated = self._find_path_to_goal_actions(goals, cross_divide, waste_trees)
+            return (bfs_path, False) if path is None or truncated else (path, False)
+        # Every search after the first starts from where the last one ended
+        if self.incremental.unreachable(goals[:1], cross_divide, waste_trees, deadline=self.deadline):
+            return None, False
+        prev_state = None
+        path = []
+        start_pos = self.player.get_position()
+        for goal in goals:
+            if point_search == 'a_star':
+                # A* never restricts backtracking so it can be used either way
+                # The walking distance from the goal never overestimates so it
+                # is a much closer heuristic than the Manhattan distance
+                search = self.a_star.perform_a_star_search([goal], (start_pos[0], start_pos[1]),
+                            cross_divide=cross_divide, prev_state=prev_state, waste_trees=waste_trees,
+                            heuristic=self.game_map.distance_field(goal).heuristic(), deadline=self.deadline)
+            else:
+                search = self.bfs.perform_bfs_search((start_pos[0], start_pos[1]), [goal],
+                            cross_divide=cross_divide, prev_state=prev_state, waste_trees=waste_trees, backtrack=backtrack,
+                            deadline=self.deadline)
+            if search is None:
+                return None, False
+            start_pos = search.path[-1]
+            path = path + search.path[1::]
+            prev_state = search.game_state
+            if search.truncated:
+                return path, True
 
-        return self._update_path(path)
+        return path, False
 
-    def _find_path_to_goal(self, goals, cross_divide=True, waste_trees=True, backtrack=False):
+    '''
+    The same as _find_path_to_goal but finding the path through the goals that
+    needs the fewest actions (see ActionSearch.py)
+    '''
+    def _find_path_to_goal_actions(self, goals, cross_divide, waste_trees):
         prev_state = None
         path = []
         start_pos = self.player.get_position()
+        facing = start_pos[2]
         for goal in goals:
-            #search = self.a_star.perform_a_star_search(goal, (start_pos[0], start_pos[1]), cross_divide, prev_state, waste_trees)
-            search = self.bfs.perform_bfs_search((start_pos[0], start_pos[1]), [goal],
-                        cross_divide=cross_divide, prev_state=prev_state, waste_trees=waste_trees, backtrack=backtrack)
+            # Turns are counted so the facing is carried between the goals
+            search = self.action_search.perform_action_search([goal], (start_pos[0], start_pos[1]), facing,
+                        cross_divide=cross_divide, prev_state=prev_state, waste_trees=waste_trees,
+                        heuristic=self.game_map.distance_field(goal).heuristic(), deadline=self.deadline)
             if search is None:
-                path = None
-                break
-            start_pos = search[0][-1]
-            path = path + search[0][1::]
-            prev_state = search[1]
+                return None, False
+            facing = self.action_search.final_facing(search.path) or facing
+            start_pos = search.path[-1]
+            path = path + search.path[1::]
+            prev_state = search.game_state
+            if search.truncated:
+                return path, True
 
-        return path
+        return path, False
 
     '''
-    Gets a list of all relevant and known POI and ranks by distance from current
-    location, then performs BFS until it finds a path to one of the POI
+    Gets a set of all relevant and known POI and performs a single BFS with
+    all of them as goals, so the first one reached is the nearest and the cost
+    doesn't depend on how many POI can't be reached, those that can't possibly
+    be reached are left out and if there are none left there is no search
     '''
     def find_path_to_poi(self, cross_divide=False):
-        path = None
-        poi_list = self.game_map.find_nearest_poi(self.game_map.find_poi_list(cross_divide))
-        for poi in poi_list:
-            #search = self.a_star.perform_a_star_search((poi[0], poi[1]), cross_divide=cross_divide)
-            search = self.bfs.perform_bfs_search(goal_coords=[(poi[0], poi[1])], cross_divide=cross_divide)
-            if search:
-                path = search[0][1::]
-                break
+        search = None
+        poi_set = {poi for poi in self.game_map.find_poi_list(cross_divide) if self.game_map.could_reach(poi)}
+        if poi_set and not self.incremental.unreachable(poi_set, cross_divide, deadline=self.deadline):
+            search = self.bfs.perform_bfs_search(goal_coords=poi_set, cross_divide=cross_divide,
+                                                 deadline=self.deadline)
 
-        return self._update_path(path)
+        return self._update_search(search)
 
     '''
-    Uses the simplified BFS to try and find a path to the nearest 
-    unexplored area, if can't directly reach will start to look for areas
-    that are close to unxplored regions
+    Uses the simplified BFS to try and find a path to the nearest tile on the
+    frontier, ie. one close enough to an unexplored area that it will be
+    revealed when the tile is visited
     '''
     def find_path_to_explore(self, cross_divide=False, waste_trees=False):
-        path = None
-        for search_radius in range(3):
-            bfs_search = self.bfs.perform_bfs_search(cross_divide=cross_divide, expand_search=search_radius, waste_trees=waste_trees)
-            if bfs_search:
-                path = bfs_search[0][1::]
-                break
-
-        return self._update_path(path)
+        bfs_search = self.bfs.perform_bfs_search(cross_divide=cross_divide, waste_trees=waste_trees,
+                                                 deadline=self.deadline)
+        if self._update_search(bfs_search):
+            self.explore_target = bfs_search.path[-1]
+        return self.has_steps()
 
     '''
     First build up a set containing the inaccessible_regions that might be of interest
@@ -96,11 +180,91 @@ class Path:
     '''
     def find_path_to_new_land(self):
         accessible_region, inaccessible_region = self.game_map.find_unexplored_regions()
-        path = None
-        bfs_search = self.bfs.perform_bfs_search(goal_coords=inaccessible_region, use_stones=True)
-        if bfs_search:
-            path = bfs_search[0][1::]
-        return self._update_path(path)
+        bfs_search = self.bfs.perform_bfs_search(goal_coords=inaccessible_region, use_stones=True,
+                                                 deadline=self.deadline)
+        return self._update_search(bfs_search)
+
+    '''
+    Plan a route to the treasure and back over the regions of the map (see
+    RegionGraph.py), which can find plans where items, stones and rafts need
+    to be used in the right order, and then use BFS to find the path for the
+    first part of it
+    '''
+    def find_path_with_regions(self):
+        # The regions only depend on the tiles so are kept until the map changes
+        region_graph = self.region_graph
+        if region_graph is None or region_graph.version != self.game_map.version:
+            region_graph = RegionGraph(self.game_map)
+            region_graph.cancelled = self.bfs.cancelled
+            # The regions are only kept once they have all been found
+            if not region_graph.build(self.deadline):
+                return self.has_steps()
+            self.region_graph = region_graph
+        plan = region_graph.plan(self.deadline)
+        if not plan:
+            return self.has_steps()
+        goal_coords, options = region_graph.first_goal(plan)
+        bfs_search = self.bfs.perform_bfs_search(goal_coords=goal_coords, deadline=self.deadline, **options)
+        return self._update_search(bfs_search)
+
+    '''
+    Plan a single move without searching, used as a fallback when no path can
+    be found in time, the next tile on the last path found is preferred, then
+    the neighbour closest to an unexplored area, and if the player can't move
+    anywhere they turn on the spot instead. A move can always be planned, it
+    is treated like a truncated path so is only followed for one move
+    '''
+    def find_fallback_step(self):
+        x, y = self.player.get_position()[:2]
+        candidates = []
+        # Fallback moves don't replace the last path so it keeps guiding them
+        # for as long as they follow it
+        last_path = self.last_path
+        if (x, y) in last_path[self.last_path_index:]:
+            self.last_path_index = last_path.index((x, y), self.last_path_index) + 1
+        if self.last_path_index < len(last_path):
+            candidates.append(last_path[self.last_path_index])
+        frontier = self.game_map.frontier
+        neighbours = [(x + direction[0], y + direction[1]) for direction in self.player.DIRECTIONS.values()]
+        # Tiles that aren't on the frontier are further from unexplored areas
+        # than any that are
+        candidates.extend(sorted(neighbours, key=lambda pos: frontier.get(pos, self.game_map.VIEW_RADIUS + 1)))
+        for new_pos in candidates:
+            if abs(new_pos[0] - x) + abs(new_pos[1] - y) == 1 and self.bfs.can_move(new_pos):
+                return self._update_path([new_pos], truncated=True, guide=False)
+        self.clear_steps()
+        self.steps = ['l']
+        self.truncated = True
+        return self.has_steps()
+
+    '''
+    Total number of search nodes expanded by all searches so far
+    '''
+    def nodes_expanded(self):
+        return self.bfs.nodes_expanded + self.a_star.nodes_expanded + self.action_search.nodes_expanded + \
+            self.incremental.nodes_expanded + self.worker_nodes_expanded
+
+    '''
+    Total number of searches started so far
+    '''
+    def searches_run(self):
+        return self.bfs.searches_run + self.a_star.searches_run + self.action_search.searches_run + \
+            self.incremental.searches_run + self.worker_searches_run
+
+    '''
+    Follow a path that was found by a copy of this object, such as one in
+    another process, along with the tile it was exploring if any
+    '''
+    def follow_path(self, path, truncated=False, explore_target=None):
+        if self._update_path(path, truncated):
+            self.explore_target = explore_target
+        return self.has_steps()
+
+    '''
+    Total number of searches answered from the cache so far
+    '''
+    def cache_hits(self):
+        return self.bfs.cache_hits
 
     '''
     Find the next step that should be taken by the agent to get closer to
@@ -109,11 +273,30 @@ class Path:
     def next_step(self):
         if self.has_steps():
             next_step = self.steps.pop(0)
+            if next_step == 'f':
+                self.path_index += 1
             self.game_map.update_map_after_move(next_step)
             return next_step
         else:
             return ''
 
+    '''
+    Check if the rest of the path can still be followed after the map has
+    been updated, it can't if any of the tiles left on it have changed, and
+    it shouldn't be if the gold or a new POI has been found which may be a
+    better goal, or if it was exploring as the tiles seen may have put
+    somewhere unexplored closer (keeping those paths made some maps take
+    many more moves)
+    '''
+    def path_still_valid(self):
+        game_map = self.game_map
+        if game_map.poi_found:
+            return False
+        if self.explore_target is not None:
+            return False
+        changed_cells = game_map.changed_cells
+        return not any(pos in changed_cells for pos in self.path[self.path_index:])
+
     '''
     Find if there are any steps left to take on a planned path
     '''
@@ -126,16 +309,34 @@ class Path:
     def clear_steps(self):
         self.path = []
         self.steps = []
+        self.truncated = False
+        self.path_index = 0
+        self.explore_target = None
 
     '''
-    Update the path and find steps if needed
+    Update the path and find steps if needed, guide is whether it replaces the
+    last path used to guide fallback moves
     '''
-    def _update_path(self, path):
+    def _update_path(self, path, truncated=False, guide=True):
         if path:
             self.path = path
+            if guide:
+                self.last_path = path
+                self.last_path_index = 0
+            self.path_index = 0
+            self.explore_target = None
+            self.truncated = truncated
             self._find_steps()
         return self.has_steps()
 
+    '''
+    Update the path from a single search result, the start position is left off
+    '''
+    def _update_search(self, search):
+        if search is None:
+            return self.has_steps()
+        return self._update_path(search.path[1::], search.truncated)
+
     '''
     Convert the path list which contains coords into a list of actions to take
     by the agent in order to carry out that path, this may require making turns,
@@ -157,7 +358,7 @@ class Path:
                     for _ in range(abs(change_facing[0])):
                         self.steps.append(turn_dir)
                 # Determine what is in front of agent
-                new_tile = self.game_map.map[new_pos[1]][new_pos[0]]
+                new_tile = self.game_map.map.get_tile(new_pos[0], new_pos[1])
                 # Use tool if needed
                 if new_tile == '-':
                     if self.player.have_key:
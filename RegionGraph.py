@@ -0,0 +1,330 @@
+'''
+RegionGraph.py
+Contains the RegionGraph class which contracts the known map into regions of
+land and water, joined by what is needed to get between them (a key for a
+door, an axe for a tree, a raft or enough stones for water), so that plans
+that need items, stones and rafts used in the right order can be found by
+searching over a handful of regions instead of every tile
+It extends the Search class for its flags for the items held and so that
+finding the regions and planning stop at the deadline like the other searches
+Date created: 18/10/2026
+'''
+
+from collections import deque
+from Search import Search
+
+class RegionGraph(Search):
+
+    # Tiles that can be walked on without needing any tools
+    LAND = frozenset(ord(tile) for tile in (' ', 'O', 'o', '$', 'a', 'k'))
+    WATER = ord('~')
+    TREE = ord('T')
+    DOOR = ord('-')
+    STONE = ord('o')
+    # Items that are collected when a region is visited, and the flag for each
+    ITEMS = {ord('a'): Search.HAVE_AXE, ord('k'): Search.HAVE_KEY, ord('$'): Search.HAVE_TREASURE}
+    # Most abstract states the planner will look at before giving up
+    MAX_STATES = 50000
+
+    def __init__(self, game_map):
+        super().__init__(game_map)
+        self.tiles = game_map.map
+        # The map version the regions were found for
+        self.version = game_map.version
+        # Tiles looked at while finding the regions, counted to know when to
+        # check the deadline
+        self._expanded = 0
+
+    '''
+    Find the regions and what joins them, deadline is the time.perf_counter()
+    value to stop by, returns False if it was reached before they were all
+    found, in which case the graph can't be used
+    '''
+    def build(self, deadline=None):
+        self.searches_run += 1
+        self._expanded = 0
+        return self._find_regions(deadline) and self._find_gates() and self._find_crossings(deadline)
+
+    '''
+    Count a tile being looked at while finding the regions, returns True if
+    the deadline has been reached
+    '''
+    def _count_tile(self, deadline):
+        if deadline is not None and self._out_of_budget(self._expanded, None, deadline):
+            return True
+        self._expanded += 1
+        self.nodes_expanded += 1
+        return False
+
+    '''
+    Label every known land and water tile with the connected region it is in,
+    regions are numbered from 0 and region_of holds -1 for other tiles
+    '''
+    def _find_regions(self, deadline):
+        cells, width = self.tiles.cells, self.tiles.width
+        self.region_of = region_of = [-1] * len(cells)
+        # Tiles in each region and whether it is land
+        self.members = []
+        self.is_land = []
+        steps = (-width, 1, width, -1)
+        for index, code in enumerate(cells):
+            if region_of[index] >= 0 or not (code in self.LAND or code == self.WATER):
+                continue
+            land = code in self.LAND
+            region = len(self.members)
+            region_of[index] = region
+            members = [index]
+            queue = deque(members)
+            while queue:
+                if self._count_tile(deadline):
+                    return False
+                current = queue.popleft()
+                for step in steps:
+                    neighbour = current + step
+                    code = cells[neighbour]
+                    if region_of[neighbour] < 0 and ((code in self.LAND) if land else code == self.WATER):
+                        region_of[neighbour] = region
+                        members.append(neighbour)
+                        queue.append(neighbour)
+            self.members.append(members)
+            self.is_land.append(land)
+        # What is found in each land region, the number of stones and the flags
+        # of the other items
+        self.stones = [0] * len(self.members)
+        self.items = [0] * len(self.members)
+        for region, members in enumerate(self.members):
+            for index in members:
+                if cells[index] == self.STONE:
+                    self.stones[region] += 1
+                self.items[region] |= self.ITEMS.get(cells[index], 0)
+        return True
+
+    '''
+    The regions next to a tile, other than the one it is in
+    '''
+    def _neighbouring_regions(self, index):
+        width = self.tiles.width
+        region_of = self.region_of
+        return {region_of[index + step] for step in (-width, 1, width, -1)} - {-1, region_of[index]}
+
+    '''
+    Find the trees and doors that land regions meet at, and which land and
+    water regions are next to each other
+    '''
+    def _find_gates(self):
+        cells = self.tiles.cells
+        # (tile index, regions next to it) for each tree and door
+        self.trees = []
+        self.doors = []
+        for index, code in enumerate(cells):
+            if code == self.TREE or code == self.DOOR:
+                regions = {region for region in self._neighbouring_regions(index) if self.is_land[region]}
+                if regions:
+                    (self.trees if code == self.TREE else self.doors).append((index, frozenset(regions)))
+        # Land regions next to each water region
+        self.shores = {region: set() for region, land in enumerate(self.is_land) if not land}
+        for region, members in enumerate(self.members):
+            if self.is_land[region]:
+                continue
+            for index in members:
+                self.shores[region] |= self._neighbouring_regions(index)
+        return True
+
+    '''
+    For each pair of land regions on the shore of the same water region find
+    the fewest stones needed to get from one to the other, found with a BFS
+    over the water tiles starting next to the first region
+    '''
+    def _find_crossings(self, deadline):
+        width = self.tiles.width
+        region_of = self.region_of
+        steps = (-width, 1, width, -1)
+        # (from region, to region) -> stones needed
+        self.crossings = {}
+        for water, shore in self.shores.items():
+            for land in shore:
+                # Number of stones placed to stand on each water tile
+                stones = {}
+                queue = deque()
+                for index in self.members[water]:
+                    if any(region_of[index + step] == land for step in steps):
+                        stones[index] = 1
+                        queue.append(index)
+                while queue:
+                    if self._count_tile(deadline):
+                        return False
+                    index = queue.popleft()
+                    for step in steps:
+                        neighbour = index + step
+                        region = region_of[neighbour]
+                        if region == water and neighbour not in stones:
+                            stones[neighbour] = stones[index] + 1
+                            queue.append(neighbour)
+                        elif region != land and region in shore:
+                            key = (land, region)
+                            if stones[index] < self.crossings.get(key, stones[index] + 1):
+                                self.crossings[key] = stones[index]
+        return True
+
+    '''
+    The region a position is in, or -1
+    '''
+    def region(self, pos):
+        index = self.tiles.index(pos[0], pos[1])
+        return -1 if index < 0 else self.region_of[index]
+
+    '''
+    The positions of a list of tile indexes
+    '''
+    def positions(self, indexes):
+        tiles = self.tiles
+        return {(tiles.min_x + index % tiles.width, tiles.min_y + index // tiles.width) for index in indexes}
+
+    '''
+    Search for a plan that gets the treasure and returns to the start, each
+    state is (region, flags, stones, visited regions, regions joined by stones,
+    trees cut), entering a land region for the first time collects everything
+    in it, returns the list of hops to make as (action, region, tile index) or
+    None if there is no plan or the deadline was reached first, the actions are
+    cut: cut down the tree at the tile to get a raft
+    tree, door: go through the tree or door at the tile to the region
+    bridge: cross stones that have already been placed to the region
+    stones: place stones to get to the region
+    raft: use the raft (or the raft already being used) to get to the region,
+        any stones held are placed first as the game always does that
+    '''
+    def plan(self, deadline=None):
+        player = self.game_map.player
+        position = player.get_position()
+        start = self.region(position)
+        home = self.region(player.get_start_position())
+        if start < 0 or home < 0:
+            return None
+        flags = (self.HAVE_AXE if player.have_axe else 0) | (self.HAVE_KEY if player.have_key else 0) | \
+            (self.HAVE_RAFT if player.have_raft or player.on_raft else 0) | \
+            (self.HAVE_TREASURE if player.have_treasure else 0)
+        stones = player.num_stones_held
+        if self.is_land[start]:
+            flags |= self.items[start]
+            stones += self.stones[start]
+        start_state = (start, flags, stones, frozenset((start,)), frozenset(), frozenset())
+        parents = {start_state: None}
+        queue = deque((start_state,))
+        expanded = 0
+        self.searches_run += 1
+        while queue and len(parents) < self.MAX_STATES:
+            if deadline is not None and self._out_of_budget(expanded, None, deadline):
+                return None
+            expanded += 1
+            self.nodes_expanded += 1
+            state = queue.popleft()
+            if state[0] == home and state[1] & self.HAVE_TREASURE:
+                return self._trace_plan(parents, state)
+            for hop, new_state in self._next_states(state):
+                if new_state not in parents:
+                    parents[new_state] = (state, hop)
+                    queue.append(new_state)
+        return None
+
+    '''
+    Rebuild the list of hops that led to a state
+    '''
+    def _trace_plan(self, parents, state):
+        plan = []
+        while parents[state] is not None:
+            state, hop = parents[state]
+            plan.append(hop)
+        plan.reverse()
+        return plan
+
+    '''
+    The states that can be reached from a state with one hop, as (hop, state)
+    '''
+    def _next_states(self, state):
+        region, flags, stones, visited, bridges, cut = state
+        if not self.is_land[region]:
+            # Only happens at the start when already on a raft
+            for land in self.shores[region]:
+                yield ('raft', land, -1), self._enter(land, flags & ~self.HAVE_RAFT, stones, visited, bridges, cut)
+            return
+        for index, regions in self.trees:
+            if region not in regions or index in cut or not flags & self.HAVE_AXE:
+                continue
+            # Cutting a tree down always gives a raft
+            new_cut = cut | {index}
+            if not flags & self.HAVE_RAFT:
+                yield ('cut', region, index), (region, flags | self.HAVE_RAFT, stones, visited, bridges, new_cut)
+            for land in regions - {region}:
+                yield ('tree', land, index), self._enter(land, flags | self.HAVE_RAFT, stones, visited, bridges, new_cut)
+        for index, regions in self.trees:
+            if region in regions and index in cut:
+                for land in regions - {region}:
+                    yield ('tree', land, index), self._enter(land, flags, stones, visited, bridges, cut)
+        if flags & self.HAVE_KEY:
+            for index, regions in self.doors:
+                if region in regions:
+                    for land in regions - {region}:
+                        yield ('door', land, index), self._enter(land, flags, stones, visited, bridges, cut)
+        for water, shore in self.shores.items():
+            if region not in shore:
+                continue
+            for land in shore - {region}:
+                if frozenset((region, land)) in bridges:
+                    yield ('bridge', land, -1), self._enter(land, flags, stones, visited, bridges, cut)
+                    continue
+                needed = self.crossings[(region, land)]
+                if needed <= stones:
+                    yield ('stones', land, -1), self._enter(land, flags, stones - needed, visited,
+                                                            bridges | {frozenset((region, land))}, cut)
+                elif flags & self.HAVE_RAFT:
+                    # Stones are always placed before the raft is used so all
+                    # of them are used up, and leaving the raft to go on land
+                    # means it is lost
+                    yield ('raft', land, -1), self._enter(land, flags & ~self.HAVE_RAFT, 0, visited, bridges, cut)
+
+    '''
+    The state after entering a land region, collecting everything in it the
+    first time it is visited
+    '''
+    def _enter(self, region, flags, stones, visited, bridges, cut):
+        if region not in visited:
+            flags |= self.items[region]
+            stones += self.stones[region]
+            visited = visited | {region}
+        return region, flags, stones, visited, bridges, cut
+
+    '''
+    The concrete goal for the first part of a plan, as a set of goal positions
+    and the options for a BFS to reach them, the items in the region the player
+    is in are collected before leaving it as the plan relies on having them
+    '''
+    def first_goal(self, plan):
+        player = self.game_map.player
+        region = self.region(player.get_position())
+        cells = self.tiles.cells
+        if region >= 0 and self.is_land[region]:
+            items = [index for index in self.members[region]
+                     if cells[index] == self.STONE or self.ITEMS.get(cells[index], 0) & ~self._player_flags()]
+            if items:
+                return self.positions(items), {'cross_divide': any(cells[index] == self.STONE for index in items)}
+        action, target, index = plan[0]
+        if action == 'cut':
+            return self.positions([index]), {'cross_divide': True}
+        goal = self.positions(self.members[target])
+        if action == 'stones':
+            return goal, {'use_stones': True}
+        if action == 'tree' and player.have_raft:
+            # The tree has to be cut down while a raft is held, which wastes
+            # the raft it gives so is only done when asked for
+            return goal, {'cross_divide': True, 'waste_trees': True}
+        if action in ('tree', 'raft'):
+            return goal, {'cross_divide': True}
+        return goal, {}
+
+    '''
+    The item flags for what the player already has
+    '''
+    def _player_flags(self):
+        player = self.game_map.player
+        return (self.HAVE_AXE if player.have_axe else 0) | (self.HAVE_KEY if player.have_key else 0) | \
+            (self.HAVE_TREASURE if player.have_treasure else 0)
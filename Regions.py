@@ -0,0 +1,101 @@
+'''
+Regions.py
+Contains the Regions class which keeps track of connected regions of walkable
+land using union-find, it is updated as tiles are revealed or opened up so
+questions about which land is connected can be answered without searching
+Date created: 18/10/2026
+'''
+
+class Regions:
+
+    # Neighbouring positions that are connected to a tile
+    NEIGHBOURS = ((0, -1), (1, 0), (0, 1), (-1, 0))
+
+    def __init__(self):
+        # Parent of each walkable position, roots are their own parent
+        self.parent = dict()
+        # Positions in each region, keyed by the root of the region
+        self.members = dict()
+
+    '''
+    Add a walkable position and join it to any walkable neighbours, walkable
+    land never stops being walkable so positions are never removed
+    '''
+    def add(self, pos):
+        if pos in self.parent:
+            return
+        self.parent[pos] = pos
+        self.members[pos] = {pos}
+        for direction in self.NEIGHBOURS:
+            neighbour = (pos[0] + direction[0], pos[1] + direction[1])
+            if neighbour in self.parent:
+                self.union(pos, neighbour)
+
+    '''
+    Find the root of the region containing a position, or None if the
+    position isn't walkable
+    '''
+    def find(self, pos):
+        parent = self.parent
+        if pos not in parent:
+            return None
+        while parent[pos] != pos:
+            # Path halving keeps the trees shallow
+            parent[pos] = parent[parent[pos]]
+            pos = parent[pos]
+        return pos
+
+    '''
+    Join the regions containing two positions, the smaller region is merged
+    into the larger one
+    '''
+    def union(self, pos_a, pos_b):
+        root_a = self.find(pos_a)
+        root_b = self.find(pos_b)
+        if root_a == root_b:
+            return root_a
+        if len(self.members[root_a]) < len(self.members[root_b]):
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.members[root_a] |= self.members.pop(root_b)
+        return root_a
+
+    '''
+    The set of positions connected to pos, this is the set used internally so
+    it must not be modified
+    '''
+    def region(self, pos):
+        root = self.find(pos)
+        if root is None:
+            return frozenset()
+        return self.members[root]
+
+    '''
+    All walkable positions that aren't connected to pos
+    '''
+    def other_regions(self, pos):
+        return OtherRegions(self, pos)
+
+
+class OtherRegions:
+
+    '''
+    A live view of all walkable positions that aren't connected to pos, it
+    supports fast membership tests so it can be used directly as goal_coords
+    '''
+    def __init__(self, regions, pos):
+        self.regions = regions
+        self.pos = pos
+
+    def __contains__(self, pos):
+        root = self.regions.find(pos)
+        return root is not None and root != self.regions.find(self.pos)
+
+    def __iter__(self):
+        excluded_root = self.regions.find(self.pos)
+        for root, members in list(self.regions.members.items()):
+            if root != excluded_root:
+                yield from members
+
+    def __len__(self):
+        return len(self.regions.parent) - len(self.regions.region(self.pos))
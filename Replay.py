@@ -0,0 +1,108 @@
+#!/usr/bin/python3
+
+'''
+Replay.py
+Replays a game recorded with Agent.py -t offline, each view in the trace is fed
+to a new agent and the action it decides on is checked against the one that was
+sent, the time taken by every decision is measured and one turn can be run
+under cProfile, so a slow decision can be looked at without playing the game
+again
+Date created: 18/10/2026
+
+Usage:
+    python Replay.py trace_file [-p turn] [-o profile_file] [-n slowest]
+
+The replay uses the point search and search budget the game was recorded with,
+with a search budget the decisions depend on how fast the machine is so they
+may not match. The agent is kept in step with the trace when a decision does
+not match by going back to a snapshot of what it knew before deciding (see
+Snapshot.py) and making the recorded move instead, with a new Goals as the
+path it was following no longer applies. The exit status is 1 if any decision
+did not match.
+'''
+
+import argparse
+import cProfile
+import pstats
+import sys
+import time
+from Player import Player
+from GameMap import GameMap
+from Goals import Goals
+from Snapshot import Snapshot
+from Trace import Trace
+
+'''
+Replay the turns of a trace, profile_turn is the number (from 1) of a turn to
+run under cProfile, returns a list of (turn, recorded action, action decided,
+seconds taken), the cProfile.Profile if a turn was profiled, and the GameMap
+as it is after the last turn
+'''
+def replay(turns, point_search='bfs', search_budget=None, profile_turn=None):
+    player = Player()
+    game_map = GameMap(player)
+    goals = Goals(game_map, search_budget=search_budget, point_search=point_search)
+    results = []
+    profile = None
+    for turn, (view, recorded) in enumerate(turns, 1):
+        if turn == profile_turn:
+            profile = cProfile.Profile()
+            profile.enable()
+        start = time.perf_counter()
+        game_map.update_map(view)
+        elapsed = time.perf_counter() - start
+        if turn == profile_turn:
+            profile.disable()
+        # Deciding changes the map and the player as if the move was made, so
+        # what they were before is kept in case it has to be undone
+        snapshot = Snapshot.dumps(game_map)
+        if turn == profile_turn:
+            profile.enable()
+        start = time.perf_counter()
+        action = goals.next_action()
+        elapsed += time.perf_counter() - start
+        if turn == profile_turn:
+            profile.disable()
+        results.append((turn, recorded, action, elapsed))
+        if action != recorded:
+            game_map = Snapshot(snapshot).restore()
+            player = game_map.player
+            goals = Goals(game_map, search_budget=search_budget, point_search=point_search)
+            game_map.update_map_after_move(recorded)
+        player.player_action(recorded)
+    return results, profile, game_map
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Replay a game recorded with Agent.py -t')
+    parser.add_argument('trace_file')
+    parser.add_argument('-p', '--profile', type=int, help='turn to run under cProfile')
+    parser.add_argument('-o', '--output', help='file to write the profile to instead of printing it')
+    parser.add_argument('-n', '--slowest', type=int, default=10, help='number of the slowest turns to list')
+    args = parser.parse_args()
+
+    try:
+        point_search, search_budget, turns = Trace.load(args.trace_file)
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        sys.exit(2)
+    if args.profile is not None and not 1 <= args.profile <= len(turns):
+        print(f'Turn {args.profile} is not in the trace, it has {len(turns)} turns', file=sys.stderr)
+        sys.exit(2)
+
+    results, profile, game_map = replay(turns, point_search, search_budget, args.profile)
+    mismatches = [result for result in results if result[1] != result[2]]
+    total = sum(result[3] for result in results)
+    print(f'{len(results)} turns, {total:.3f}s deciding, {len(mismatches)} mismatched')
+    for turn, recorded, action, elapsed in mismatches:
+        print(f'Turn {turn}: recorded {recorded} but decided {action}')
+    if args.slowest > 0:
+        print('Slowest turns:')
+    for turn, recorded, action, elapsed in sorted(results, key=lambda result: -result[3])[:args.slowest]:
+        print(f'  turn {turn}: {elapsed * 1000:.1f}ms')
+    if profile is not None:
+        if args.output:
+            profile.dump_stats(args.output)
+        else:
+            pstats.Stats(profile).sort_stats('cumulative').print_stats(30)
+    if mismatches:
+        sys.exit(1)
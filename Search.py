@@ -7,6 +7,13 @@ zID: 5184128
 Date created: 18/05/2018
 '''
 
+import time
+from collections import namedtuple
+
+# What a search returns, truncated is True when it ran out of budget before
+# reaching a goal and the path only leads as far as it got
+SearchResult = namedtuple('SearchResult', ['path', 'game_state', 'truncated'])
+
 class Search:
 
     # Determine valid movements based on current direction of movement, favour continue straight line
@@ -15,94 +22,288 @@ class Search:
                   (0, 1): [(0, 1), (1, 0), (-1, 0)],
                   (-1, 0): [(-1, 0), (0, 1), (0, -1)]}
 
+    # The game_state is packed into a single int so that it hashes quickly and
+    # successors can be made without copying lists, the low bits are flags
+    HAVE_AXE = 1
+    HAVE_KEY = 1 << 1
+    HAVE_RAFT = 1 << 2
+    ON_RAFT = 1 << 3
+    CROSS_DIVIDE = 1 << 4
+    WASTE_TREES = 1 << 5
+    USE_STONES = 1 << 6
+    HAVE_TREASURE = 1 << 7
+    SHOULD_BACKTRACK = 1 << 8
+    # Followed by the number of stones held
+    STONE_SHIFT = 9
+    STONE_UNIT = 1 << STONE_SHIFT
+    STONE_MASK = 0xFF << STONE_SHIFT
+    # And then the ID of the interned set of stone/tree locations that have
+    # been used (stones placed or picked up, trees cut down)
+    LOC_SHIFT = 17
+    # Positions are packed with a game_state to make search nodes
+    POS_BITS = 10
+    POS_MASK = (1 << POS_BITS) - 1
+    NODE_SHIFT = POS_BITS * 2
+    # Returned by _valid_move when a move can't be made
+    INVALID = -1
+    # The flags that _valid_move depends on, they are the lowest bits of the
+    # game_state so can be used directly as part of an index into MOVE_TABLE,
+    # as can whether any stones are held which uses the next bit
+    RULE_FLAGS = HAVE_AXE | HAVE_KEY | HAVE_RAFT | ON_RAFT | CROSS_DIVIDE | WASTE_TREES | USE_STONES
+    HOLDING_STONES = RULE_FLAGS + 1
+    # Tiles that have their own rules for moving on to them
+    MOVE_TILES = (' ', '~', 'O', 'o', 'T', '-', 'a', 'k', '$')
+    STEPPING_STONE = ord('O')
+    # Flags for items held, having more of them is never worse, except for the
+    # raft as a tree can't be cut down while holding one unless WASTE_TREES is
+    # set, so a state without a raft may still get through a tree that one with
+    # a raft can't
+    ITEM_FLAGS = HAVE_AXE | HAVE_KEY | HAVE_RAFT | HAVE_TREASURE
+    # Flags that must match for one game_state to dominate another, they are
+    # the search options and where the search can go next
+    EXACT_FLAGS = ON_RAFT | CROSS_DIVIDE | WASTE_TREES | USE_STONES | SHOULD_BACKTRACK
+    # A search with a deadline only checks the clock every this many nodes
+    DEADLINE_CHECK_INTERVAL = 256
+
     def __init__(self, game_map):
         self.game_map = game_map
         self.player = self.game_map.player
+        # Interned sets of stone/tree locations, index is the ID stored in the
+        # game_state, the empty set is always 0
+        self._loc_sets = [frozenset()]
+        self._loc_ids = {frozenset(): 0}
+        # Cache of (loc_id, pos) -> loc_id after adding pos to the set
+        self._loc_added = {}
+        # Running totals used to measure how much work searches are doing
+        self.searches_run = 0
+        self.nodes_expanded = 0
+        # Optional function returning True when searches should stop early,
+        # it is checked as often as the deadline so only bounded searches stop
+        self.cancelled = None
 
     '''
     Used to determine if moving from current_pos to new_pos is valid based on
-    the current game_state, the game_state is a list containing:
-    have_axe, have_key, have_treasure, num_stones_held, have_raft, cross_divide, 
-    on_raft, stone_tree_loc, waste_trees, use_stones, should_backtrack
+    the current game_state, the game_state is an int containing the flags
+    have_axe, have_key, have_raft, on_raft, cross_divide, waste_trees,
+    use_stones, have_treasure, should_backtrack then num_stones_held and the
+    ID of stone_tree_loc, returns the new game_state or INVALID
+    The rules are looked up in MOVE_TABLE (see _move_rule) using the tiles
+    and the flags that affect the move
     '''
     def _valid_move(self, current_pos, new_pos, game_state):
-        current_tile = self.game_map.map[current_pos[1]][current_pos[0]]
-        new_tile = self.game_map.map[new_pos[1]][new_pos[0]]
-        on_raft = game_state[6]
-        stone_tree_loc = list(game_state[7])
-        game_state[10] = False
-
-        if current_pos in stone_tree_loc:
-            current_tile = 'O'
-        if new_pos in stone_tree_loc:
-            new_tile = 'O'
-        if new_tile in ['o', 'T'] and not game_state[5]:
-            return False
-        if current_tile == '~' and new_tile == '~' and game_state[6]:
-            return True
-        if current_tile == '~' and new_tile != '~' and not game_state[5]:
-            return False
-        if current_tile == '~' and new_tile != '~' and game_state[5]:
-            game_state[6] = False
-        if current_tile != '~' and new_tile == '~' and \
-                (not game_state[5] and not (game_state[3] and game_state[9])):
-            return False
-        if current_tile != '~' and new_tile == '~' and game_state[3]:
-            game_state[3] -= 1
-            stone_tree_loc.append(new_pos)
-            game_state[7] = tuple(stone_tree_loc)
-            return True
-        if current_tile != '~' and new_tile == '~' and game_state[4]:
-            game_state[4] = False
-            game_state[6] = True
-            return True
+        # Both positions are known or next to a known tile, so they are always
+        # stored in the grid and can be read directly
+        tiles = self.game_map.map
+        cells, width, offset = tiles.cells, tiles.width, tiles.offset
+        current_code = cells[current_pos[1] * width + current_pos[0] - offset]
+        new_code = cells[new_pos[1] * width + new_pos[0] - offset]
+        if game_state >> self.LOC_SHIFT:
+            stone_tree_loc = self._loc_sets[game_state >> self.LOC_SHIFT]
+            if current_pos in stone_tree_loc:
+                current_code = self.STEPPING_STONE
+            if new_pos in stone_tree_loc:
+                new_code = self.STEPPING_STONE
+        rule = self.MOVE_TABLE[self.CURRENT_TILE_INDEX[current_code] + self.NEW_TILE_INDEX[new_code] +
+                               (game_state & self.RULE_FLAGS) + (self.HOLDING_STONES if game_state & self.STONE_MASK else 0)]
+        if rule is None:
+            return self.INVALID
+        keep, add, stones, add_loc = rule
+        game_state = ((game_state & keep) | add) + stones
+        if add_loc:
+            return self._add_loc(game_state, new_pos)
+        return game_state
+
+    '''
+    The rule for moving from a tile to a new tile, flags holds the RULE_FLAGS
+    from the game_state and HOLDING_STONES if any stones are held, returns None
+    if the move isn't valid, otherwise (keep, add, stones, add_loc) where the new
+    game_state is ((game_state & keep) | add) + stones and add_loc is whether
+    the new position is added to stone_tree_loc, this is only used to build
+    MOVE_TABLE
+    '''
+    @classmethod
+    def _move_rule(cls, current_tile, new_tile, flags):
+        on_raft = flags & cls.ON_RAFT
+        cross_divide = flags & cls.CROSS_DIVIDE
+        keep = ~cls.SHOULD_BACKTRACK
+
+        if (new_tile == 'o' or new_tile == 'T') and not cross_divide:
+            return None
+        if current_tile == '~':
+            if new_tile == '~':
+                return (keep, 0, 0, False) if on_raft else None
+            if not cross_divide:
+                return None
+            keep &= ~cls.ON_RAFT
+        elif new_tile == '~':
+            stones = flags & cls.HOLDING_STONES
+            if not cross_divide and not (stones and flags & cls.USE_STONES):
+                return None
+            if stones:
+                return keep, 0, -cls.STONE_UNIT, True
+            if flags & cls.HAVE_RAFT:
+                return keep & ~cls.HAVE_RAFT, cls.ON_RAFT, 0, False
+            return None
         if new_tile == 'a':
-            if not game_state[0]:
-                game_state[10] = True
-            game_state[0] = True
-            return True
+            return keep, cls.HAVE_AXE | (0 if flags & cls.HAVE_AXE else cls.SHOULD_BACKTRACK), 0, False
         if new_tile == 'k':
-            if not game_state[1]:
-                game_state[10] = True
-            game_state[1] = True
-            return True
+            return keep, cls.HAVE_KEY | (0 if flags & cls.HAVE_KEY else cls.SHOULD_BACKTRACK), 0, False
         if new_tile == '$':
-            game_state[2] = True
-            return True
+            return keep, cls.HAVE_TREASURE, 0, False
         if new_tile == 'o':
-            game_state[10] = True
-            game_state[3] += 1
-            stone_tree_loc.append(new_pos)
-            game_state[7] = tuple(stone_tree_loc)
-            return True
-        if new_tile == 'T' and game_state[0] and not game_state[4] and not on_raft:
-            game_state[4] = True
-            stone_tree_loc.append(new_pos)
-            game_state[7] = tuple(stone_tree_loc)
-            return True
-        if new_tile == 'T' and game_state[0] and game_state[8]:
-            stone_tree_loc.append(new_pos)
-            game_state[7] = tuple(stone_tree_loc)
-            return True
+            return keep, cls.SHOULD_BACKTRACK, cls.STONE_UNIT, True
+        if new_tile == 'T' and flags & cls.HAVE_AXE:
+            if not flags & cls.HAVE_RAFT and not on_raft:
+                return keep, cls.HAVE_RAFT, 0, True
+            if flags & cls.WASTE_TREES:
+                return keep, 0, 0, True
 
-        if (new_tile == '-' and game_state[1]) or \
-           new_tile in ['O', ' ']:
-            return True
-        return False
+        if (new_tile == '-' and flags & cls.HAVE_KEY) or \
+           new_tile == 'O' or new_tile == ' ':
+            return keep, 0, 0, False
+        return None
+
+    '''
+    Build MOVE_TABLE and the tile indexes into it from _move_rule, the table
+    has an entry for each of water or land being left, each kind of tile being
+    moved to and each combination of flags
+    '''
+    @classmethod
+    def _build_move_table(cls):
+        # Every other tile can't be moved on to
+        new_tiles = cls.MOVE_TILES + ('',)
+        flag_count = cls.HOLDING_STONES << 1
+        cls.NEW_TILE_INDEX = [len(cls.MOVE_TILES) * flag_count] * 256
+        for i, tile in enumerate(cls.MOVE_TILES):
+            cls.NEW_TILE_INDEX[ord(tile)] = i * flag_count
+        cls.CURRENT_TILE_INDEX = [0] * 256
+        cls.CURRENT_TILE_INDEX[ord('~')] = len(new_tiles) * flag_count
+        cls.MOVE_TABLE = [cls._move_rule(current_tile, new_tile, flags)
+                          for current_tile in (' ', '~')
+                          for new_tile in new_tiles
+                          for flags in range(flag_count)]
+
+    '''
+    Check if the player could move from where they are now to the neighbouring
+    new_pos straight away, without crossing between land and water
+    '''
+    def can_move(self, new_pos):
+        pos = self.player.get_position()
+        return self._valid_move((pos[0], pos[1]), new_pos, self._setup_game_state(False, None)) != self.INVALID
+
+    '''
+    Add a position to the stone_tree_loc set of a game_state, the sets are
+    interned so that the game_state only needs to hold a small ID
+    '''
+    def _add_loc(self, game_state, pos):
+        loc_id = game_state >> self.LOC_SHIFT
+        key = (loc_id, pos)
+        new_id = self._loc_added.get(key)
+        if new_id is None:
+            new_set = self._loc_sets[loc_id] | {pos}
+            new_id = self._loc_ids.get(new_set)
+            if new_id is None:
+                new_id = len(self._loc_sets)
+                self._loc_sets.append(new_set)
+                self._loc_ids[new_set] = new_id
+            self._loc_added[key] = new_id
+        return (game_state & ((1 << self.LOC_SHIFT) - 1)) | (new_id << self.LOC_SHIFT)
+
+    '''
+    Test if game_state can do everything other can from the same position, it
+    holds all the same items and at least as many stones, and the stones and
+    trees it has used are among those other has used, whether a raft is held
+    must match unless trees can be wasted (see ITEM_FLAGS)
+    '''
+    def _dominates(self, game_state, other):
+        if (game_state ^ other) & self.EXACT_FLAGS or other & self.ITEM_FLAGS & ~game_state:
+            return False
+        if (game_state ^ other) & self.HAVE_RAFT and not game_state & self.WASTE_TREES:
+            return False
+        if game_state & self.STONE_MASK < other & self.STONE_MASK:
+            return False
+        loc_id, other_loc_id = game_state >> self.LOC_SHIFT, other >> self.LOC_SHIFT
+        return loc_id == other_loc_id or self._loc_sets[loc_id] <= self._loc_sets[other_loc_id]
+
+    '''
+    Combine a position and game_state into a single int search node
+    '''
+    def _pack_node(self, pos, game_state):
+        return (game_state << self.NODE_SHIFT) | (pos[1] << self.POS_BITS) | pos[0]
+
+    '''
+    Split a search node back into its position and game_state
+    '''
+    def _unpack_node(self, node):
+        return (node & self.POS_MASK, (node >> self.POS_BITS) & self.POS_MASK), node >> self.NODE_SHIFT
 
     '''
     Will find what the new positions should be relative to current location
-    will try to keep going forward if possible
+    will try to keep going forward if possible, prev_pos is where the search
+    came from to reach pos
     '''
-    def _new_directions(self, path, backtrack=False):
-        if not backtrack and len(path) > 1:
-            pre_pos = path[-2]
-            pos = path[-1]
-            pos_change = (pos[0] - pre_pos[0], pos[1] - pre_pos[1])
+    def _new_directions(self, pos, prev_pos=None, backtrack=False):
+        if not backtrack and prev_pos is not None:
+            pos_change = (pos[0] - prev_pos[0], pos[1] - prev_pos[1])
             return self.NEW_MOVEMENTS[pos_change]
         else:
             return self.player.DIRECTIONS.values()
 
+    '''
+    Rebuild the path to a search node by following the links to the node it
+    was reached from, parents maps each node to its parent (None at the start)
+    '''
+    def _trace_path(self, parents, node):
+        path = []
+        while node is not None:
+            path.append(self._unpack_node(node)[0])
+            node = parents[node]
+        path.reverse()
+        return path
+
+    '''
+    Check if a search has used up its budget after expanding some nodes,
+    max_nodes is the most nodes it may expand and deadline is the
+    time.perf_counter() value it must finish by, either may be None, a search
+    with a deadline also stops if it has been cancelled
+    '''
+    def _out_of_budget(self, expanded, max_nodes, deadline):
+        if max_nodes is not None and expanded >= max_nodes:
+            return True
+        if deadline is None or expanded % self.DEADLINE_CHECK_INTERVAL:
+            return False
+        return time.perf_counter() >= deadline or (self.cancelled is not None and self.cancelled())
+
+    '''
+    The best result that can be given when a search is stopped early, parents
+    holds every node reached, when there are only a few goals the path to the
+    node closest to one of them is used, otherwise the path to the node added
+    last which is the deepest one, the path may only contain the start position
+    '''
+    def _partial_result(self, parents, goal_coords=None, max_goals=4):
+        if isinstance(goal_coords, (set, frozenset)) and 0 < len(goal_coords) <= max_goals:
+            mask, bits = self.POS_MASK, self.POS_BITS
+            goals = list(goal_coords)
+            node = min(parents, key=lambda node: min(abs((node & mask) - goal[0]) +
+                                                     abs((node >> bits & mask) - goal[1]) for goal in goals))
+        else:
+            node = next(reversed(parents))
+        return SearchResult(self._trace_path(parents, node), self._unpack_node(node)[1], True)
+
+    '''
+    Create a heuristic giving the Manhattan distance to the nearest goal, when
+    there are too many goals to check quickly fall back to 0 which makes the
+    search behave like Dijkstra's algorithm
+    '''
+    def _manhattan_heuristic(self, goal_coords, max_goals=16):
+        if len(goal_coords) > max_goals:
+            return lambda pos: 0
+        goals = list(goal_coords)
+        if len(goals) == 1:
+            goal = goals[0]
+            return lambda pos: self._manhattan_distance(pos, goal)
+        return lambda pos: min(self._manhattan_distance(pos, goal) for goal in goals)
+
     '''
     Find the Manhattan distance between current_pos and goal
     '''
@@ -117,9 +318,27 @@ class Search:
     the initial game_state
     '''
     def _setup_game_state(self, cross_divide, prev_state, waste_trees=False, use_stones=False):
-        game_state = [self.player.have_axe, self.player.have_key, self.player.have_treasure,
-                      self.player.num_stones_held, self.player.have_raft, cross_divide,
-                      self.player.on_raft, (), waste_trees, use_stones, False]
         if prev_state is not None:
-            game_state = list(prev_state)
-        return game_state
\ No newline at end of file
+            return prev_state
+        player = self.player
+        game_state = player.num_stones_held << self.STONE_SHIFT
+        if player.have_axe:
+            game_state |= self.HAVE_AXE
+        if player.have_key:
+            game_state |= self.HAVE_KEY
+        if player.have_treasure:
+            game_state |= self.HAVE_TREASURE
+        if player.have_raft:
+            game_state |= self.HAVE_RAFT
+        if player.on_raft:
+            game_state |= self.ON_RAFT
+        if cross_divide:
+            game_state |= self.CROSS_DIVIDE
+        if waste_trees:
+            game_state |= self.WASTE_TREES
+        if use_stones:
+            game_state |= self.USE_STONES
+        return game_state
+
+
+Search._build_move_table()
@@ -0,0 +1,241 @@
+'''
+Simulator.py
+Contains the Simulator class which is a pure Python port of the game engine in
+Tests/Step.java, it allows games to be played in process without the Java
+server or a socket
+Date created: 18/10/2026
+'''
+
+from Player import Player
+from GameMap import GameMap
+from Goals import Goals
+
+class Simulator:
+
+    # Directions use the same values as Step.java
+    EAST = 0
+    NORTH = 1
+    WEST = 2
+    SOUTH = 3
+    # Characters used to show the agent on the map
+    AGENT_DIRECTIONS = {'^': NORTH, '>': EAST, 'v': SOUTH, '<': WEST}
+    # Same default as Step.java
+    MAX_MOVES = 10000
+
+    def __init__(self, map_file):
+        self.have_axe = False
+        self.have_key = False
+        self.have_treasure = False
+        self.have_raft = False
+        self.on_raft = False
+        self.off_map = False
+        self.game_won = False
+        self.game_lost = False
+        self.num_dynamites_held = 0
+        self.num_stones_held = 0
+        self.row = self.col = self.dirn = 0
+        self._read_map(map_file)
+
+    '''
+    Read the map in the same format as Step.java, it stops at the first empty
+    line and the agent's start position and facing come from ^ > v <
+    '''
+    def _read_map(self, map_file):
+        self.map = []
+        with open(map_file) as f:
+            for line in f.read().split('\n'):
+                if not line:
+                    break
+                row = list(line)
+                for col, tile in enumerate(row):
+                    if tile in self.AGENT_DIRECTIONS:
+                        self.dirn = self.AGENT_DIRECTIONS[tile]
+                        self.row = len(self.map)
+                        self.col = col
+                self.map.append(row)
+        self.nrows = len(self.map)
+        self.irow = self.row
+        self.icol = self.col
+
+    '''
+    Test if a position is on the map, rows may be different lengths
+    '''
+    def _on_map(self, row, col):
+        return 0 <= row < self.nrows and 0 <= col < len(self.map[row])
+
+    '''
+    The 24 bytes the server would send, the 5x5 area around the agent rotated
+    to its facing with the agent itself left out
+    '''
+    def get_view(self):
+        view = bytearray()
+        for i in range(-2, 3):
+            for j in range(-2, 3):
+                if i == 0 and j == 0:
+                    continue
+                if self.dirn == self.NORTH:
+                    row, col = self.row + i, self.col + j
+                elif self.dirn == self.SOUTH:
+                    row, col = self.row - i, self.col - j
+                elif self.dirn == self.EAST:
+                    row, col = self.row + j, self.col - i
+                else:
+                    row, col = self.row - j, self.col + i
+                view.append(ord(self.map[row][col]) if self._on_map(row, col) else ord('.'))
+        return bytes(view)
+
+    '''
+    Carry out an action with the same rules as Step.java, returns False when
+    the action couldn't be done
+    '''
+    def apply(self, action):
+        if action in ('L', 'l'):
+            self.dirn = (self.dirn + 1) % 4
+            return True
+        if action in ('R', 'r'):
+            self.dirn = (self.dirn + 3) % 4
+            return True
+
+        d_row = d_col = 0
+        if self.dirn == self.NORTH:
+            d_row = -1
+        elif self.dirn == self.SOUTH:
+            d_row = 1
+        elif self.dirn == self.EAST:
+            d_col = 1
+        else:
+            d_col = -1
+        new_row = self.row + d_row
+        new_col = self.col + d_col
+
+        if not self._on_map(new_row, new_col):
+            if action in ('F', 'f'):
+                if not self.off_map:
+                    self.map[self.row][self.col] = '~'
+                    self.off_map = True
+                self.row = new_row
+                self.col = new_col
+                self.game_lost = True
+                return True
+            return False
+
+        tile = self.map[new_row][new_col]
+        if action in ('F', 'f'):
+            return self._move_forward(new_row, new_col, tile)
+        if action in ('C', 'c'):
+            if tile == 'T' and self.have_axe:
+                self.map[new_row][new_col] = ' '
+                self.have_raft = True
+                return True
+        elif action in ('U', 'u'):
+            if tile == '-' and self.have_key:
+                self.map[new_row][new_col] = ' '
+                return True
+        elif action in ('B', 'b'):
+            if self.num_dynamites_held > 0 and tile in ('*', 'T', '-'):
+                self.map[new_row][new_col] = ' '
+                self.num_dynamites_held -= 1
+                return True
+        return False
+
+    '''
+    Move forward onto a tile, can't move into an obstacle
+    '''
+    def _move_forward(self, new_row, new_col, tile):
+        if tile in ('*', 'T', '-'):
+            return False
+        if not self.off_map and self.map[self.row][self.col] != 'O':
+            self.map[self.row][self.col] = ' '
+
+        if tile == '~':
+            if self.on_raft:
+                if not self.off_map:
+                    self.map[self.row][self.col] = '~'
+            elif self.num_stones_held > 0:
+                self.num_stones_held -= 1
+                if not self.off_map:
+                    self.map[new_row][new_col] = 'O'
+            elif self.have_raft:
+                self.on_raft = True
+                if not self.off_map and self.map[self.row][self.col] != 'O':
+                    self.map[self.row][self.col] = ' '
+            else:
+                self.game_lost = True
+        elif tile in (' ', 'a', 'k', '$', 'd', 'o', 'O'):
+            if self.on_raft and not self.off_map:
+                self.map[self.row][self.col] = '~'
+                self.on_raft = False
+                self.have_raft = False
+
+        self.row = new_row
+        self.col = new_col
+        if tile == 'a':
+            self.have_axe = True
+        elif tile == 'k':
+            self.have_key = True
+        elif tile == '$':
+            self.have_treasure = True
+        elif tile == 'd':
+            self.num_dynamites_held += 1
+        elif tile == 'o':
+            self.num_stones_held += 1
+        if self.have_treasure and self.row == self.irow and self.col == self.icol:
+            self.game_won = True
+        if not self.off_map and self.map[self.row][self.col] != 'O':
+            self.map[self.row][self.col] = ' '
+        self.off_map = False
+        return True
+
+    '''
+    Show the map with the agent on it, same as Step.java
+    '''
+    def print_map(self):
+        agent = {self.NORTH: '^', self.EAST: '>', self.SOUTH: 'v', self.WEST: '<'}[self.dirn]
+        print()
+        for row in range(self.nrows):
+            print(''.join(agent if (row, col) == (self.row, self.col) else tile
+                          for col, tile in enumerate(self.map[row])))
+        print()
+
+    '''
+    Play a whole game with the agent, choose_action is called with each view
+    and returns the action to take, returns the number of moves made
+    '''
+    def play(self, choose_action, max_moves=MAX_MOVES, silent=True):
+        if not silent:
+            self.print_map()
+        for move in range(1, max_moves + 1):
+            action = choose_action(self.get_view())
+            if not silent:
+                print(f'action = {action}')
+            # The server reads a single character for each move
+            self.apply(action[:1])
+            if not silent:
+                self.print_map()
+            if self.game_won or self.game_lost:
+                return move
+        return max_moves
+
+    '''
+    The outcome of the game in the same words Step.java uses
+    '''
+    def result(self, moves):
+        if self.game_won:
+            return f'Game Won in {moves} moves.'
+        if self.game_lost:
+            return 'Game Lost.'
+        return f'Exceeded maximum of {moves} moves.'
+
+
+'''
+Play a game on a map file with a new agent and return the simulator and the
+number of moves made
+'''
+def run_game(map_file, max_moves=Simulator.MAX_MOVES, silent=True):
+    from Agent import find_action
+    player = Player()
+    game_map = GameMap(player)
+    goals = Goals(game_map)
+    simulator = Simulator(map_file)
+    moves = simulator.play(lambda data: find_action(data, player, game_map, goals), max_moves, silent)
+    return simulator, moves
@@ -0,0 +1,136 @@
+'''
+Snapshot.py
+Contains the Snapshot class which saves what the agent knows (the tiles of the
+GameMap, its bounds and the Player) in a compact binary format, a fixed size
+header followed by the tile codes exactly as they are stored in the TileGrid,
+so a snapshot can be made or loaded with a couple of copies, sent to other
+processes, or kept on disk and read through a memory map without loading it
+Everything else GameMap keeps (POI, regions, the frontier) is worked out from
+the tiles when a snapshot is restored
+Date created: 18/10/2026
+'''
+
+import mmap
+import struct
+from GameMap import GameMap
+from Player import Player
+from TileGrid import TileGrid
+
+class Snapshot:
+
+    MAGIC = b'TMAP'
+    FORMAT_VERSION = 1
+    # Header fields in order, all stored as little endian 32 bit ints after the
+    # magic and format version
+    FIELDS = ('x', 'y', 'start_x', 'start_y', 'facing', 'items', 'stones',
+              'min_x', 'min_y', 'max_x', 'max_y',
+              'min_bound_x', 'min_bound_y', 'max_bound_x', 'max_bound_y',
+              'map_version', 'grid_min_x', 'grid_min_y', 'grid_width', 'grid_height')
+    HEADER = struct.Struct('<4sI' + 'i' * len(FIELDS))
+    FACINGS = ('N', 'E', 'S', 'W')
+    # Player attributes packed into the items field, one bit each
+    ITEMS = ('have_axe', 'have_key', 'have_treasure', 'have_raft', 'on_raft')
+
+    '''
+    Read a snapshot from buffer, which can be bytes, a memoryview or an mmap,
+    the tiles are a view of the buffer so nothing is copied until restore
+    '''
+    def __init__(self, buffer):
+        header = self.HEADER.unpack_from(buffer)
+        if header[0] != self.MAGIC or header[1] != self.FORMAT_VERSION:
+            raise ValueError('Not a map snapshot or an unsupported version')
+        for field, value in zip(self.FIELDS, header[2:]):
+            setattr(self, field, value)
+        self.tiles = memoryview(buffer)[self.HEADER.size:self.HEADER.size + self.grid_width * self.grid_height]
+        if len(self.tiles) != self.grid_width * self.grid_height:
+            raise ValueError('Map snapshot is truncated')
+        self._mmap = None
+
+    '''
+    Pack the game map and its player into the snapshot format
+    '''
+    @classmethod
+    def dumps(cls, game_map):
+        player = game_map.player
+        tiles = game_map.map
+        items = sum(1 << i for i, item in enumerate(cls.ITEMS) if getattr(player, item))
+        header = cls.HEADER.pack(cls.MAGIC, cls.FORMAT_VERSION,
+                                 player.x, player.y, player.start_x, player.start_y,
+                                 cls.FACINGS.index(player.facing), items, player.num_stones_held,
+                                 game_map.min_x, game_map.min_y, game_map.max_x, game_map.max_y,
+                                 game_map.min_bound_x, game_map.min_bound_y,
+                                 game_map.max_bound_x, game_map.max_bound_y, game_map.version,
+                                 tiles.min_x, tiles.min_y, tiles.width, tiles.height)
+        return header + tiles.cells
+
+    '''
+    Write a snapshot of the game map to a file
+    '''
+    @classmethod
+    def save(cls, game_map, file_name):
+        with open(file_name, 'wb') as f:
+            f.write(cls.dumps(game_map))
+
+    '''
+    Open a snapshot file through a memory map, only the parts that are read
+    are loaded, close must be called when done with it
+    '''
+    @classmethod
+    def open(cls, file_name):
+        with open(file_name, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        snapshot = cls(mapped)
+        snapshot._mmap = mapped
+        return snapshot
+
+    '''
+    Load a snapshot file and restore the game map from it
+    '''
+    @classmethod
+    def load(cls, file_name):
+        snapshot = cls.open(file_name)
+        try:
+            return snapshot.restore()
+        finally:
+            snapshot.close()
+
+    '''
+    Release the memory map if the snapshot was opened from a file
+    '''
+    def close(self):
+        if self._mmap is not None:
+            self.tiles.release()
+            self._mmap.close()
+            self._mmap = None
+
+    '''
+    Get the code of the tile at a position, 0 if it isn't known
+    '''
+    def get_code(self, x, y):
+        x -= self.grid_min_x
+        y -= self.grid_min_y
+        if 0 <= x < self.grid_width and 0 <= y < self.grid_height:
+            return self.tiles[y * self.grid_width + x]
+        return TileGrid.UNKNOWN
+
+    '''
+    Build a new Player and GameMap holding what was saved
+    '''
+    def restore(self):
+        player = Player()
+        player.x, player.y = self.x, self.y
+        player.start_x, player.start_y = self.start_x, self.start_y
+        player.facing = self.FACINGS[self.facing]
+        for i, item in enumerate(self.ITEMS):
+            setattr(player, item, bool(self.items & 1 << i))
+        player.num_stones_held = self.stones
+        game_map = GameMap(player)
+        game_map.map = TileGrid.from_cells(self.grid_min_x, self.grid_min_y, self.grid_width, self.grid_height,
+                                           self.tiles)
+        game_map.min_x, game_map.min_y = self.min_x, self.min_y
+        game_map.max_x, game_map.max_y = self.max_x, self.max_y
+        game_map.min_bound_x, game_map.min_bound_y = self.min_bound_x, self.min_bound_y
+        game_map.max_bound_x, game_map.max_bound_y = self.max_bound_x, self.max_bound_y
+        game_map.version = self.map_version
+        game_map.rebuild_from_tiles()
+        return game_map
@@ -0,0 +1,144 @@
+'''
+TileGrid.py
+Contains the TileGrid class which is a dense, array backed store for the tiles
+of the game world, it replaces the nested defaultdict previously used by GameMap
+Date created: 18/10/2026
+'''
+
+import numpy as np
+
+class TileGrid:
+
+    # Unknown tiles are stored as 0, every known tile is stored as its ASCII code
+    # which means the bytes received from the server can be written directly
+    UNKNOWN = 0
+    # Convert a stored code back into the tile string used by the rest of the code
+    TILES = ('',) + tuple(chr(code) for code in range(1, 256))
+    # Number of tiles to reserve around the origin when the grid is created
+    INITIAL_RADIUS = 12
+    # Unknown tiles kept in storage around every known tile, this means that
+    # searches can probe the neighbours of known tiles without bounds checks
+    MARGIN = 3
+
+    def __init__(self, origin=(100, 100)):
+        radius = self.INITIAL_RADIUS
+        self.min_x = origin[0] - radius
+        self.min_y = origin[1] - radius
+        self.width = self.height = radius * 2 + 1
+        self._allocate()
+
+    '''
+    Create the storage, the bytearray is used for fast single tile access and
+    the numpy array is a 2D view over the same memory for bulk operations
+    A position is stored at cells[y * width + x - offset]
+    '''
+    def _allocate(self, cells=None):
+        if cells is None:
+            cells = bytearray(self.width * self.height)
+        self.cells = cells
+        self.grid = np.frombuffer(self.cells, dtype=np.uint8).reshape(self.height, self.width)
+        self.offset = self.min_y * self.width + self.min_x
+
+    '''
+    Find the offset of a position in cells, or -1 if it isn't stored
+    '''
+    def index(self, x, y):
+        x -= self.min_x
+        y -= self.min_y
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return y * self.width + x
+        return -1
+
+    '''
+    Get the code stored at a position, anything outside the grid is unknown
+    and reading it never causes the grid to grow
+    '''
+    def get_code(self, x, y):
+        x -= self.min_x
+        y -= self.min_y
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.cells[y * self.width + x]
+        return self.UNKNOWN
+
+    '''
+    Get the tile at a position as a string, '' when unknown
+    '''
+    def get_tile(self, x, y):
+        x -= self.min_x
+        y -= self.min_y
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.TILES[self.cells[y * self.width + x]]
+        return ''
+
+    '''
+    Store a tile at a position, growing the grid if needed
+    '''
+    def set_tile(self, x, y, tile):
+        margin = self.MARGIN
+        self.ensure_area(x - margin, y - margin, x + margin, y + margin)
+        self.cells[y * self.width + x - self.offset] = ord(tile) if tile else self.UNKNOWN
+
+    '''
+    Get a writable numpy view of the rectangle of height rows and width columns
+    with its top left corner at (min_x, min_y), the rectangle and MARGIN tiles
+    around it are made sure to be stored first
+    '''
+    def window(self, min_x, min_y, width, height):
+        margin = self.MARGIN
+        self.ensure_area(min_x - margin, min_y - margin, min_x + width - 1 + margin, min_y + height - 1 + margin)
+        x = min_x - self.min_x
+        y = min_y - self.min_y
+        return self.grid[y:y + height, x:x + width]
+
+    '''
+    Make sure that the rectangle from (min_x, min_y) to (max_x, max_y) inclusive
+    is stored, when it isn't the grid grows by at least half its size in each
+    direction needed so that growing happens rarely
+    '''
+    def ensure_area(self, min_x, min_y, max_x, max_y):
+        old_min_x, old_min_y = self.min_x, self.min_y
+        old_width, old_height = self.width, self.height
+        if min_x >= old_min_x and min_y >= old_min_y and \
+                max_x < old_min_x + old_width and max_y < old_min_y + old_height:
+            return
+        new_min_x = min(min_x, old_min_x - old_width // 2) if min_x < old_min_x else old_min_x
+        new_min_y = min(min_y, old_min_y - old_height // 2) if min_y < old_min_y else old_min_y
+        new_max_x = old_min_x + old_width - 1
+        new_max_y = old_min_y + old_height - 1
+        if max_x > new_max_x:
+            new_max_x = max(max_x, new_max_x + old_width // 2)
+        if max_y > new_max_y:
+            new_max_y = max(max_y, new_max_y + old_height // 2)
+        old_grid = self.grid
+        self.min_x, self.min_y = new_min_x, new_min_y
+        self.width = new_max_x - new_min_x + 1
+        self.height = new_max_y - new_min_y + 1
+        self._allocate()
+        x_off = old_min_x - new_min_x
+        y_off = old_min_y - new_min_y
+        self.grid[y_off:y_off + old_height, x_off:x_off + old_width] = old_grid
+
+    '''
+    Make a grid with its top left corner at (min_x, min_y) holding cells, a
+    bytearray of width * height codes laid out the same as in the grid
+    '''
+    @classmethod
+    def from_cells(cls, min_x, min_y, width, height, cells):
+        grid = cls.__new__(cls)
+        grid.__setstate__({'min_x': min_x, 'min_y': min_y, 'width': width, 'height': height, 'cells': cells})
+        return grid
+
+    '''
+    The numpy view can't be pickled without losing the link to cells, so only
+    store the plain data and rebuild the view when loading
+    '''
+    def __getstate__(self):
+        return {'min_x': self.min_x, 'min_y': self.min_y, 'width': self.width,
+                'height': self.height, 'cells': bytes(self.cells)}
+
+    def __setstate__(self, state):
+        self.min_x = state['min_x']
+        self.min_y = state['min_y']
+        self.width = state['width']
+        self.height = state['height']
+        self._allocate(bytearray(state['cells']))
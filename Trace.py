@@ -0,0 +1,69 @@
+'''
+Trace.py
+Contains the Trace class which records every view received from the server and
+every action sent back to a compact binary file, so that a game can be replayed
+offline without the server (see Replay.py)
+The file starts with a header holding the options that change the decisions the
+agent makes, then one record per turn of the 24 byte view followed by the one
+byte action
+Date created: 18/10/2026
+'''
+
+import math
+import struct
+from Path import Path
+
+class Trace:
+
+    MAGIC = b'TRCE'
+    FORMAT_VERSION = 1
+    # Magic, format version, index of the point search in Path.POINT_SEARCHES
+    # and the search budget in seconds (NaN when there is none)
+    HEADER = struct.Struct('<4sHBd')
+    VIEW_SIZE = 24
+    RECORD_SIZE = VIEW_SIZE + 1
+
+    '''
+    file_name: the file to write the trace to
+    point_search, search_budget: the options the agent is playing with, so the
+        replay can make the same decisions
+    '''
+    def __init__(self, file_name, point_search='bfs', search_budget=None):
+        self._file = open(file_name, 'wb')
+        self._file.write(self.HEADER.pack(self.MAGIC, self.FORMAT_VERSION, Path.POINT_SEARCHES.index(point_search),
+                                          math.nan if search_budget is None else search_budget))
+
+    '''
+    Record one turn, the view received and the action sent for it, each turn is
+    written straight away so the trace is still usable if the agent is killed
+    Every turn takes the same number of bytes, so the action must be a single
+    character or the turns after it could not be read back
+    '''
+    def record(self, view, action):
+        if len(action) != 1:
+            raise ValueError(f'Can only record a single character action, not {action!r}')
+        self._file.write(bytes(view) + action.encode())
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    '''
+    Read a trace file, returns (point_search, search_budget, turns) where turns
+    is a list of (view, action)
+    '''
+    @classmethod
+    def load(cls, file_name):
+        with open(file_name, 'rb') as f:
+            data = f.read()
+        if len(data) < cls.HEADER.size:
+            raise ValueError('Not a trace file')
+        magic, version, point_search, search_budget = cls.HEADER.unpack_from(data)
+        if magic != cls.MAGIC or version != cls.FORMAT_VERSION:
+            raise ValueError('Not a trace file or an unsupported version')
+        turns = []
+        # A record cut short by the agent being killed is left out
+        end = len(data) - (len(data) - cls.HEADER.size) % cls.RECORD_SIZE
+        for start in range(cls.HEADER.size, end, cls.RECORD_SIZE):
+            turns.append((data[start:start + cls.VIEW_SIZE], chr(data[start + cls.VIEW_SIZE])))
+        return Path.POINT_SEARCHES[point_search], None if math.isnan(search_budget) else search_budget, turns
@@ -0,0 +1,89 @@
+'''
+test_distance_field.py
+Tests that the distance fields kept by GameMap are repaired to the same
+distances as working them out again from scratch, run with python -m pytest
+Date created: 18/10/2026
+'''
+
+import os
+import tempfile
+import unittest
+from Player import Player
+from GameMap import GameMap
+from Goals import Goals
+from Simulator import Simulator
+from DistanceField import DistanceField
+from Agent import find_action
+
+TESTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Tests')
+# A corridor where the only way from one side of the start to the other is
+# across the start tile, which is never in view
+CORRIDOR_MAP = ('*******',
+                '*  >  *',
+                '*******')
+
+class TestDistanceField(unittest.TestCase):
+
+    '''
+    Check that every field the game map keeps that hasn't been marked out of
+    date has the same distances as a new one, returns how many were checked
+    '''
+    def assert_fields_repaired(self, game_map):
+        checked = 0
+        for source, field in game_map._distance_fields.items():
+            if field._out_of_date():
+                continue
+            fresh = DistanceField(game_map.map, source)
+            fresh.update()
+            self.assertEqual(field.distances, fresh.distances, source)
+            checked += 1
+        return checked
+
+    '''
+    Play s6 checking the fields after every turn, they are brought up to date
+    before each turn so that they are repaired from the tiles the view and
+    the move change, starting with the whole of the first view
+    '''
+    def test_repair_matches_full_update(self):
+        player = Player()
+        game_map = GameMap(player)
+        goals = Goals(game_map)
+        game_map.distance_field(player.get_start_position()).update()
+        checked = []
+
+        def choose_action(data):
+            for field in game_map._distance_fields.values():
+                if field._out_of_date():
+                    field.update()
+            action = find_action(data, player, game_map, goals)
+            checked.append(self.assert_fields_repaired(game_map))
+            return action
+        Simulator(os.path.join(TESTS_DIR, 's6.in')).play(choose_action, 200)
+        # Only growing the grid means a field has to be worked out again
+        self.assertGreater(sum(1 for count in checked if count), len(checked) * 3 // 4)
+
+    '''
+    The start tile is set by the game map rather than seen, fields must be
+    repaired for it too
+    '''
+    def test_start_tile_is_repaired(self):
+        handle, map_file = tempfile.mkstemp(suffix='.in')
+        with os.fdopen(handle, 'w') as f:
+            f.write('\n'.join(CORRIDOR_MAP) + '\n')
+        try:
+            simulator = Simulator(map_file)
+        finally:
+            os.remove(map_file)
+        player = Player()
+        game_map = GameMap(player)
+        x, y = player.get_position()[:2]
+        # The player is taken to face south, so the field is from the tile
+        # that is behind them in the corridor
+        field = game_map.distance_field((x, y - 1))
+        field.update()
+        game_map.update_map(simulator.get_view())
+        self.assertEqual(self.assert_fields_repaired(game_map), 1)
+        self.assertEqual(field.distance((x, y + 2)), 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+'''
+test_replay.py
+Tests for recording games with Trace and replaying them with Replay, run with
+python -m pytest
+Date created: 18/10/2026
+'''
+
+import os
+import tempfile
+import unittest
+from Player import Player
+from GameMap import GameMap
+from Goals import Goals
+from Simulator import Simulator
+from Agent import find_action
+from Trace import Trace
+from Replay import replay
+
+TESTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Tests')
+# A turn of the s6 game where the agent moves forward on to a stone
+STONE_TURN = 118
+
+class TestReplay(unittest.TestCase):
+
+    '''
+    Play s6 recording a trace and load it back
+    '''
+    def setUp(self):
+        player = Player()
+        game_map = GameMap(player)
+        goals = Goals(game_map)
+        handle, self.trace_file = tempfile.mkstemp(suffix='.trace')
+        os.close(handle)
+        trace = Trace(self.trace_file)
+
+        def choose_action(data):
+            action = find_action(data, player, game_map, goals)
+            trace.record(data, action)
+            return action
+        Simulator(os.path.join(TESTS_DIR, 's6.in')).play(choose_action)
+        trace.close()
+        self.point_search, self.search_budget, self.turns = Trace.load(self.trace_file)
+
+    def tearDown(self):
+        os.remove(self.trace_file)
+
+    def test_replay_matches(self):
+        results, profile, game_map = replay(self.turns)
+        self.assertEqual([result for result in results if result[1] != result[2]], [])
+        self.assertTrue(game_map.player.have_treasure)
+
+    '''
+    When the recorded action is changed the agent must end up as if it made
+    the recorded move, not the one it decided on
+    '''
+    def test_altered_trace_stays_in_step(self):
+        before = replay(self.turns[:STONE_TURN - 1])[2].player
+        decided = replay(self.turns[:STONE_TURN])[2].player
+        view, action = self.turns[STONE_TURN - 1]
+        self.assertEqual(action, 'f')
+        self.assertEqual(decided.num_stones_held, before.num_stones_held + 1)
+
+        altered = self.turns[:STONE_TURN - 1] + [(view, 'l')]
+        results, profile, game_map = replay(altered)
+        self.assertEqual([result[0] for result in results if result[1] != result[2]], [STONE_TURN])
+        player = game_map.player
+        self.assertEqual(player.num_stones_held, before.num_stones_held)
+        self.assertEqual(player.get_position()[:2], before.get_position()[:2])
+        self.assertEqual(player.get_facing(), {'N': 'W', 'W': 'S', 'S': 'E', 'E': 'N'}[before.get_facing()])
+        # The stone is still there to be picked up
+        self.assertEqual(game_map.map.get_tile(*before.forward_coords()), 'o')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,448 @@
+'''
+test_search.py
+Regression tests for the searches, run with python -m pytest
+Date created: 18/10/2026
+'''
+
+import itertools
+import unittest
+from Player import Player
+from GameMap import GameMap
+from Search import Search
+from Bfs import Bfs
+from IncrementalSearch import IncrementalSearch
+from AStar import AStar
+from ActionSearch import ActionSearch
+from Path import Path
+
+# S is where the player starts, G is the goal and P is land, all three are
+# stored as land
+RAFT_TREE_MAP = ('*******',
+                 '*~~~~**',
+                 '*~** **',
+                 '*S  PTG',
+                 '*******')
+# The goal is walled off so can never be reached
+WALLED_MAP = ('*******',
+              '*S  *G*',
+              '*******')
+# The axe is next to the start and the gold is behind two trees, cutting the
+# first one gives a raft so the second has to be cut while holding it
+TWO_TREE_MAP = ('********',
+                '*SaT T$*',
+                '********')
+# The path with the fewest tiles zig-zags to the goal, the one with the fewest
+# actions goes the long way round in straight lines, the player starts facing
+# south
+ZIGZAG_MAP = ('********',
+              '*S  ****',
+              '* *  ***',
+              '* **  **',
+              '* ***  *',
+              '* **** *',
+              '* ****G*',
+              '*      *',
+              '********')
+# Searching with an axe and a key for more goals than the heuristic checks
+# (so it is 0 everywhere) reaches the same node for the same cost as a path
+# finishing at the goal
+DOORS_MAP = ('*******',
+             '*--  G*',
+             '* T -T*',
+             '*  -  *',
+             '* ** -*',
+             '*S  * *',
+             '*T   T*',
+             '*******')
+# Land past a stone and a tree, with the axe next to the start
+BLOCKED_MAP = ('*********',
+               '*Sa o P *',
+               '*** *****',
+               '*   T P *',
+               '*********')
+# A corridor that hasn't been seen past its open end
+UNEXPLORED_MAP = ('******',
+                  '*S G  ',
+                  '******')
+# Open ground with nothing to choose between moves
+OPEN_MAP = ('*******',
+            '*     *',
+            '*S    *',
+            '*     *',
+            '*******')
+
+'''
+Make a GameMap holding the rows given, with the player on S, returns the game
+map and the position of G
+'''
+def make_map(rows):
+    player = Player()
+    game_map = GameMap(player)
+    start_x, start_y = player.get_position()[:2]
+    start_row = next(y for y, row in enumerate(rows) if 'S' in row)
+    origin_x, origin_y = start_x - rows[start_row].index('S'), start_y - start_row
+    goal = None
+    for y, row in enumerate(rows):
+        for x, tile in enumerate(row):
+            game_map.map.set_tile(origin_x + x, origin_y + y, ' ' if tile in 'SPG' else tile)
+            if tile == 'G':
+                goal = (origin_x + x, origin_y + y)
+    return game_map, goal
+
+'''
+Make the player follow the steps planned by path until there are none left
+'''
+def follow_steps(path):
+    while path.has_steps():
+        path.game_map.player.player_action(path.next_step())
+
+'''
+The rules for moving on to a tile as they were written before MOVE_TABLE,
+state is a dict of the parts of the game_state which is updated, returns
+whether the move can be made
+'''
+def plain_valid_move(current_tile, new_tile, current_pos, new_pos, state):
+    on_raft = state['on_raft']
+    state['should_backtrack'] = False
+    if current_pos in state['locs']:
+        current_tile = 'O'
+    if new_pos in state['locs']:
+        new_tile = 'O'
+    if new_tile in ['o', 'T'] and not state['cross_divide']:
+        return False
+    if current_tile == '~' and new_tile == '~' and state['on_raft']:
+        return True
+    if current_tile == '~' and new_tile != '~' and not state['cross_divide']:
+        return False
+    if current_tile == '~' and new_tile != '~' and state['cross_divide']:
+        state['on_raft'] = False
+    if current_tile != '~' and new_tile == '~' and \
+            (not state['cross_divide'] and not (state['stones'] and state['use_stones'])):
+        return False
+    if current_tile != '~' and new_tile == '~' and state['stones']:
+        state['stones'] -= 1
+        state['locs'] = state['locs'] | {new_pos}
+        return True
+    if current_tile != '~' and new_tile == '~' and state['have_raft']:
+        state['have_raft'] = False
+        state['on_raft'] = True
+        return True
+    if new_tile == 'a':
+        if not state['have_axe']:
+            state['should_backtrack'] = True
+        state['have_axe'] = True
+        return True
+    if new_tile == 'k':
+        if not state['have_key']:
+            state['should_backtrack'] = True
+        state['have_key'] = True
+        return True
+    if new_tile == '$':
+        state['have_treasure'] = True
+        return True
+    if new_tile == 'o':
+        state['should_backtrack'] = True
+        state['stones'] += 1
+        state['locs'] = state['locs'] | {new_pos}
+        return True
+    if new_tile == 'T' and state['have_axe'] and not state['have_raft'] and not on_raft:
+        state['have_raft'] = True
+        state['locs'] = state['locs'] | {new_pos}
+        return True
+    if new_tile == 'T' and state['have_axe'] and state['waste_trees']:
+        state['locs'] = state['locs'] | {new_pos}
+        return True
+    if (new_tile == '-' and state['have_key']) or new_tile in ['O', ' ']:
+        return True
+    return False
+
+# The game_state flag for each part of the state used by plain_valid_move
+STATE_FLAGS = {'have_axe': Search.HAVE_AXE, 'have_key': Search.HAVE_KEY, 'have_raft': Search.HAVE_RAFT,
+               'on_raft': Search.ON_RAFT, 'cross_divide': Search.CROSS_DIVIDE, 'waste_trees': Search.WASTE_TREES,
+               'use_stones': Search.USE_STONES, 'have_treasure': Search.HAVE_TREASURE,
+               'should_backtrack': Search.SHOULD_BACKTRACK}
+
+class TestDominance(unittest.TestCase):
+
+    '''
+    Holding a raft stops the tree being cut down, so the state that has used
+    the raft to reach the tile next to it must not be pruned by the one that
+    walked there still holding the raft
+    '''
+    def test_raft_does_not_dominate_for_cutting_trees(self):
+        game_map, goal = make_map(RAFT_TREE_MAP)
+        game_map.player.have_axe = game_map.player.have_raft = True
+        search = Bfs(game_map).perform_bfs_search(goal_coords={goal}, cross_divide=True)
+        self.assertIsNotNone(search)
+        self.assertEqual(search.path[-1], goal)
+
+class TestActionSearch(unittest.TestCase):
+
+    '''
+    The number of actions needed to follow a path from the player
+    '''
+    def count_actions(self, game_map, path):
+        follower = Path(game_map)
+        follower.follow_path(path[1:])
+        return len(follower.steps)
+
+    def test_path_has_fewest_actions(self):
+        game_map, goal = make_map(ZIGZAG_MAP)
+        fewest_tiles = AStar(game_map).perform_a_star_search([goal]).path
+        fewest_actions = ActionSearch(game_map).perform_action_search([goal]).path
+        self.assertEqual(fewest_actions[-1], goal)
+        self.assertLess(len(fewest_tiles), len(fewest_actions))
+        self.assertEqual(self.count_actions(game_map, fewest_tiles), 18)
+        self.assertEqual(self.count_actions(game_map, fewest_actions), 14)
+
+    '''
+    Entries in the open set that tie on everything before the goal must not
+    have their goals compared
+    '''
+    def test_tied_entries_with_and_without_goal(self):
+        game_map, goal = make_map(DOORS_MAP)
+        game_map.player.have_axe = game_map.player.have_key = True
+        goals = [goal] + [(goal[0] + 50 + i, goal[1] + 50) for i in range(16)]
+        for facing in ActionSearch.FACINGS:
+            search = ActionSearch(game_map).perform_action_search(goals, facing=facing, cross_divide=True)
+            self.assertEqual(search.path[-1], goal)
+
+class TestBfsCache(unittest.TestCase):
+
+    def setUp(self):
+        self.game_map, self.goal = make_map(OPEN_MAP)
+        self.bfs = Bfs(self.game_map)
+
+    '''
+    Run a search and check whether it was answered from the cache
+    '''
+    def assert_search(self, cached, **kwargs):
+        searches_run, cache_hits = self.bfs.searches_run, self.bfs.cache_hits
+        self.bfs.perform_bfs_search(**kwargs)
+        self.assertEqual(self.bfs.cache_hits - cache_hits, 1 if cached else 0, kwargs)
+        self.assertEqual(self.bfs.searches_run - searches_run, 0 if cached else 1, kwargs)
+
+    def test_same_search_is_cached(self):
+        x, y = self.game_map.player.get_position()[:2]
+        self.assert_search(False, goal_coords=[(x + 3, y)])
+        self.assert_search(True, goal_coords=[(x + 3, y)])
+        # The goals are a set so the order they are given in doesn't matter
+        self.assert_search(False, goal_coords=[(x + 3, y), (x, y + 1)])
+        self.assert_search(True, goal_coords=((x, y + 1), (x + 3, y)))
+
+    '''
+    Changing the map moves on to a new version, so the search runs again
+    '''
+    def test_map_change_runs_search_again(self):
+        x, y = self.game_map.player.get_position()[:2]
+        self.assert_search(False, goal_coords=[(x + 3, y)])
+        version = self.game_map.version
+        self.game_map._set_tile((x + 2, y), '*')
+        self.assertNotEqual(self.game_map.version, version)
+        self.assert_search(False, goal_coords=[(x + 3, y)])
+        self.assert_search(True, goal_coords=[(x + 3, y)])
+
+    '''
+    The start, game_state, goals and backtrack are all part of the key
+    '''
+    def test_different_options_run_search_again(self):
+        x, y = self.game_map.player.get_position()[:2]
+        goal = [(x + 3, y)]
+        self.assert_search(False, goal_coords=goal)
+        self.assert_search(False, goal_coords=goal, cross_divide=True)
+        self.assert_search(False, goal_coords=goal, cross_divide=True, waste_trees=True)
+        self.assert_search(False, goal_coords=goal, use_stones=True)
+        self.assert_search(False, goal_coords=goal, backtrack=True)
+        self.assert_search(False, goal_coords=[(x + 3, y - 1)])
+        self.assert_search(False, goal_coords=None)
+        self.assert_search(False, goal_coords=goal, pos=(x + 1, y))
+        self.game_map.player.num_stones_held = 1
+        self.assert_search(False, goal_coords=goal)
+        self.game_map.player.num_stones_held = 0
+        self.assert_search(True, goal_coords=goal)
+
+    '''
+    A search stopped by the deadline might have found more with longer so it
+    isn't cached
+    '''
+    def test_truncated_search_is_not_cached(self):
+        x, y = self.game_map.player.get_position()[:2]
+        self.assertTrue(self.bfs.perform_bfs_search(goal_coords=[(x + 3, y - 1)], max_nodes=1).truncated)
+        self.assert_search(False, goal_coords=[(x + 3, y - 1)])
+
+class TestMoveTable(unittest.TestCase):
+
+    '''
+    Split a game_state into the parts used by plain_valid_move
+    '''
+    def unpack(self, search, game_state):
+        state = {name: bool(game_state & flag) for name, flag in STATE_FLAGS.items()}
+        state['stones'] = (game_state & search.STONE_MASK) >> search.STONE_SHIFT
+        state['locs'] = search._loc_sets[game_state >> search.LOC_SHIFT]
+        return state
+
+    '''
+    Moving between every pair of tiles with every combination of flags, stones
+    held and used stones and trees gives the same result from MOVE_TABLE as
+    from the rules it was built from
+    '''
+    def test_table_matches_plain_rules(self):
+        game_map = GameMap(Player())
+        search = Search(game_map)
+        current_pos, new_pos = (100, 100), (101, 100)
+        tiles = Search.MOVE_TILES + ('*', '.', '')
+        flags = list(STATE_FLAGS.values())
+        for current_tile, new_tile in itertools.product(tiles, repeat=2):
+            game_map.map.set_tile(*current_pos, current_tile)
+            game_map.map.set_tile(*new_pos, new_tile)
+            for count in range(len(flags) + 1):
+                for chosen in itertools.combinations(flags, count):
+                    for stones, locs in itertools.product((0, 1), ((), (current_pos,), (new_pos,))):
+                        game_state = sum(chosen) | stones << Search.STONE_SHIFT
+                        for pos in locs:
+                            game_state = search._add_loc(game_state, pos)
+                        expected = self.unpack(search, game_state)
+                        valid = plain_valid_move(current_tile, new_tile, current_pos, new_pos, expected)
+                        new_game_state = search._valid_move(current_pos, new_pos, game_state)
+                        case = (current_tile, new_tile, game_state)
+                        if not valid:
+                            self.assertEqual(new_game_state, Search.INVALID, case)
+                        else:
+                            self.assertNotEqual(new_game_state, Search.INVALID, case)
+                            self.assertEqual(self.unpack(search, new_game_state), expected, case)
+
+class TestIncrementalSearch(unittest.TestCase):
+
+    '''
+    A goal that can be reached must never be reported as unreachable, as the
+    other searches are then skipped
+    '''
+    def test_reachable_goal_is_not_unreachable(self):
+        game_map, goal = make_map(RAFT_TREE_MAP)
+        game_map.player.have_axe = game_map.player.have_raft = True
+        self.assertFalse(IncrementalSearch(game_map).unreachable([goal], cross_divide=True))
+
+    def test_walled_off_goal_is_unreachable(self):
+        game_map, goal = make_map(WALLED_MAP)
+        self.assertTrue(IncrementalSearch(game_map).unreachable([goal], cross_divide=True))
+
+    '''
+    A search stopped by the deadline carries on from where it got to the next
+    time it is asked for rather than starting again
+    '''
+    def test_search_stopped_by_deadline_is_resumed(self):
+        game_map, goal = make_map(WALLED_MAP)
+        full = IncrementalSearch(game_map)
+        full.unreachable([goal], cross_divide=True)
+        search = IncrementalSearch(game_map)
+        self.assertFalse(search.unreachable([goal], cross_divide=True, deadline=0))
+        self.assertTrue(search.unreachable([goal], cross_divide=True))
+        self.assertEqual(search.nodes_expanded, full.nodes_expanded)
+
+class TestRegionPlan(unittest.TestCase):
+
+    '''
+    Every part of a region plan up to getting the gold can be followed,
+    including going through a tree while already holding the raft from
+    cutting down another
+    '''
+    def test_plan_cuts_second_tree_holding_raft(self):
+        game_map, goal = make_map(TWO_TREE_MAP)
+        player = game_map.player
+        path = Path(game_map)
+        for _ in range(10):
+            if player.have_treasure:
+                break
+            self.assertTrue(path.find_path_with_regions())
+            follow_steps(path)
+        self.assertTrue(player.have_treasure)
+
+    '''
+    Finding the regions stops at the deadline, and regions that weren't all
+    found aren't kept to be planned over later
+    '''
+    def test_regions_stop_at_deadline(self):
+        game_map, goal = make_map(TWO_TREE_MAP)
+        path = Path(game_map)
+        path.deadline = 0
+        self.assertFalse(path.find_path_with_regions())
+        self.assertIsNone(path.region_graph)
+        path.deadline = None
+        self.assertTrue(path.find_path_with_regions())
+
+class TestUnexploredRegions(unittest.TestCase):
+
+    '''
+    Stones and trees aren't walked on by a search that doesn't cross the
+    divide, so the land past them is inaccessible even holding the axe, until
+    the tree is cut down
+    '''
+    def test_stones_and_trees_divide_regions(self):
+        game_map, goal = make_map(BLOCKED_MAP)
+        player = game_map.player
+        x, y = player.get_position()[:2]
+        stone, stone_land = (x + 3, y), (x + 5, y)
+        tree, tree_land = (x + 3, y + 2), (x + 5, y + 2)
+        player.have_axe = True
+        game_map.rebuild_from_tiles()
+        accessible, inaccessible = game_map.find_unexplored_regions()
+        self.assertIn((x, y), accessible)
+        for loc in (stone, tree):
+            self.assertNotIn(loc, accessible)
+            self.assertNotIn(loc, inaccessible)
+        for loc in (stone_land, tree_land):
+            self.assertNotIn(loc, accessible)
+            self.assertIn(loc, inaccessible)
+        game_map._set_tile(tree, ' ')
+        accessible, inaccessible = game_map.find_unexplored_regions()
+        self.assertIn(tree_land, accessible)
+        self.assertIn(stone_land, inaccessible)
+
+class TestPathStillValid(unittest.TestCase):
+
+    '''
+    A path to a goal is kept while none of the tiles left on it change, but
+    a path that was exploring is always found again after the map updates
+    '''
+    def test_only_goal_paths_are_kept(self):
+        game_map, goal = make_map(UNEXPLORED_MAP)
+        x, y = game_map.player.get_position()[:2]
+        # make_map only stores the tiles, the frontier is found within the
+        # bounds of what has been seen
+        game_map.min_x, game_map.min_y = x - 1, y - 1
+        game_map.max_x, game_map.max_y = x + 4, y + 1
+        game_map.rebuild_from_tiles()
+        path = Path(game_map)
+        self.assertTrue(path.find_path_to_goal([goal]))
+        self.assertTrue(path.path_still_valid())
+        game_map.changed_cells = {goal}
+        self.assertFalse(path.path_still_valid())
+        game_map.changed_cells = set()
+        path.clear_steps()
+        self.assertTrue(path.find_path_to_explore())
+        self.assertIsNotNone(path.explore_target)
+        self.assertFalse(path.path_still_valid())
+
+class TestFallback(unittest.TestCase):
+
+    '''
+    Fallback moves keep following the last path found rather than each one
+    replacing it
+    '''
+    def test_fallback_follows_last_path(self):
+        game_map, goal = make_map(OPEN_MAP)
+        player = game_map.player
+        x, y = player.get_position()[:2]
+        path = Path(game_map)
+        path.last_path = [(x + 1, y), (x + 2, y), (x + 3, y), (x + 3, y - 1)]
+        for expected in path.last_path:
+            self.assertTrue(path.find_fallback_step())
+            while True:
+                action = path.next_step()
+                player.player_action(action)
+                if action == 'f':
+                    break
+            self.assertEqual(player.get_position()[:2], expected)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+'''
+test_simulator.py
+Tests that the Simulator follows the same rules as Tests/Step.java, run with
+python -m pytest
+Date created: 18/10/2026
+'''
+
+import os
+import tempfile
+import unittest
+from Simulator import Simulator
+
+# Every tile around the agent is different so the view shows where each came
+# from, the view facing north is the map read row by row, lower case letters
+# aren't used as v would be read as the agent
+LETTERS_MAP = ('ABCDE',
+               'FGHIJ',
+               'KL^MN',
+               'OPQRS',
+               'TUVWX')
+
+'''
+Make a Simulator playing the map given as a list of rows
+'''
+def make_simulator(rows):
+    handle, map_file = tempfile.mkstemp(suffix='.in')
+    with os.fdopen(handle, 'w') as f:
+        f.write('\n'.join(rows) + '\n')
+    try:
+        return Simulator(map_file)
+    finally:
+        os.remove(map_file)
+
+class TestSimulator(unittest.TestCase):
+
+    '''
+    Carry out each action in turn, they must all be possible
+    '''
+    def apply_all(self, simulator, actions):
+        for action in actions:
+            self.assertTrue(simulator.apply(action), action)
+
+    '''
+    The view is rotated so that the way the agent faces is at the top
+    '''
+    def test_view_rotation(self):
+        simulator = make_simulator(LETTERS_MAP)
+        north = b'ABCDEFGHIJKLMNOPQRSTUVWX'
+        east = b'EJNSX' + b'DIMRW' + b'CHQV' + b'BGLPU' + b'AFKOT'
+        self.assertEqual(simulator.get_view(), north)
+        simulator.apply('r')
+        self.assertEqual(simulator.get_view(), east)
+        simulator.apply('r')
+        self.assertEqual(simulator.get_view(), north[::-1])
+        simulator.apply('R')
+        self.assertEqual(simulator.get_view(), east[::-1])
+        simulator.apply('L')
+        self.assertEqual(simulator.get_view(), north[::-1])
+
+    '''
+    Anything off the edge of the map is shown as '.', the agent faces east
+    along a single row so it is seen going up the middle of the view
+    '''
+    def test_view_off_map(self):
+        simulator = make_simulator(('>  ',))
+        self.assertEqual(simulator.get_view(), b'.. ..' + b'.. ..' + b'....' + b'.....' + b'.....')
+
+    '''
+    Cutting a tree gives a raft, which is used to cross water and is lost
+    when the agent gets back on to land, the water stays as it was
+    '''
+    def test_raft(self):
+        simulator = make_simulator(('*******',
+                                    '*>aT~~ ',
+                                    '*******'))
+        self.assertFalse(simulator.apply('c'))
+        self.apply_all(simulator, 'f')
+        self.assertTrue(simulator.have_axe)
+        self.assertFalse(simulator.apply('f'))
+        self.apply_all(simulator, 'c')
+        self.assertTrue(simulator.have_raft)
+        self.assertEqual(simulator.map[1][3], ' ')
+        self.apply_all(simulator, 'ff')
+        self.assertTrue(simulator.on_raft)
+        self.assertTrue(simulator.have_raft)
+        self.apply_all(simulator, 'f')
+        self.assertEqual(simulator.map[1][4], '~')
+        self.apply_all(simulator, 'f')
+        self.assertFalse(simulator.on_raft)
+        self.assertFalse(simulator.have_raft)
+        self.assertEqual(simulator.map[1][5], '~')
+        self.assertFalse(simulator.game_lost)
+
+    '''
+    A stone held is placed when moving on to water, which turns it into a
+    stepping stone that stays after the agent moves off it
+    '''
+    def test_stone_placed_on_water(self):
+        simulator = make_simulator(('******',
+                                    '*>o~ *',
+                                    '******'))
+        self.apply_all(simulator, 'f')
+        self.assertEqual(simulator.num_stones_held, 1)
+        self.apply_all(simulator, 'f')
+        self.assertEqual(simulator.num_stones_held, 0)
+        self.assertEqual(simulator.map[1][3], 'O')
+        self.apply_all(simulator, 'fllf')
+        self.assertEqual(simulator.map[1][3], 'O')
+        self.assertFalse(simulator.game_lost)
+
+    '''
+    Moving on to water without a stone or raft, or off the map, loses the game
+    '''
+    def test_drowning(self):
+        simulator = make_simulator(('*****',
+                                    '*>~ *',
+                                    '*****'))
+        self.apply_all(simulator, 'f')
+        self.assertTrue(simulator.game_lost)
+        self.assertEqual(simulator.result(1), 'Game Lost.')
+        simulator = make_simulator(('<  ',))
+        self.apply_all(simulator, 'f')
+        self.assertTrue(simulator.game_lost)
+
+    '''
+    The game is won by getting back to the start with the treasure, play
+    returns the number of moves it took
+    '''
+    def test_win(self):
+        simulator = make_simulator(('*****',
+                                    '*>$ *',
+                                    '*****'))
+        actions = iter('fllf')
+        moves = simulator.play(lambda view: next(actions))
+        self.assertTrue(simulator.game_won)
+        self.assertEqual(moves, 4)
+        self.assertEqual(simulator.result(moves), 'Game Won in 4 moves.')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+'''
+test_snapshot.py
+Tests for saving the game map with Snapshot and restoring it, run with
+python -m pytest
+Date created: 18/10/2026
+'''
+
+import os
+import tempfile
+import unittest
+from Player import Player
+from GameMap import GameMap
+from Goals import Goals
+from Simulator import Simulator
+from Agent import find_action
+from Snapshot import Snapshot
+
+TESTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Tests')
+# Enough turns of s6 for the agent to have picked up a stone
+TURNS = 120
+
+class TestSnapshot(unittest.TestCase):
+
+    '''
+    Play part of s6 so the map has tiles, POI, regions and a frontier to save
+    '''
+    def setUp(self):
+        player = Player()
+        self.game_map = GameMap(player)
+        goals = Goals(self.game_map)
+        Simulator(os.path.join(TESTS_DIR, 's6.in')).play(
+            lambda data: find_action(data, player, self.game_map, goals), TURNS)
+        self.assertTrue(player.num_stones_held)
+
+    '''
+    Check that a restored game map knows everything the original does
+    '''
+    def assert_same_map(self, restored):
+        original = self.game_map
+        self.assertIsNot(restored.player, original.player)
+        tiles, restored_tiles = original.map, restored.map
+        self.assertEqual((restored_tiles.min_x, restored_tiles.min_y, restored_tiles.width, restored_tiles.height),
+                         (tiles.min_x, tiles.min_y, tiles.width, tiles.height))
+        self.assertEqual(bytes(restored_tiles.cells), bytes(tiles.cells))
+        player, restored_player = original.player, restored.player
+        for attribute in ('x', 'y', 'start_x', 'start_y', 'facing', 'have_axe', 'have_key', 'have_treasure',
+                          'have_raft', 'on_raft', 'num_stones_held'):
+            self.assertEqual(getattr(restored_player, attribute), getattr(player, attribute), attribute)
+        for attribute in ('version', 'min_x', 'min_y', 'max_x', 'max_y',
+                          'min_bound_x', 'min_bound_y', 'max_bound_x', 'max_bound_y',
+                          'gold_loc', 'axe_loc', 'key_loc', 'door_loc', 'stone_loc', 'tree_loc', 'frontier'):
+            self.assertEqual(getattr(restored, attribute), getattr(original, attribute), attribute)
+        self.assertEqual({frozenset(members) for members in restored.regions.members.values()},
+                         {frozenset(members) for members in original.regions.members.values()})
+
+    def test_restore_from_bytes(self):
+        self.assert_same_map(Snapshot(Snapshot.dumps(self.game_map)).restore())
+
+    '''
+    Saving to a file and opening it through a memory map, the restored map
+    must not depend on the file once it is closed
+    '''
+    def test_restore_from_file(self):
+        handle, file_name = tempfile.mkstemp(suffix='.map')
+        os.close(handle)
+        try:
+            Snapshot.save(self.game_map, file_name)
+            snapshot = Snapshot.open(file_name)
+            try:
+                restored = snapshot.restore()
+            finally:
+                snapshot.close()
+            self.assert_same_map(restored)
+            self.assert_same_map(Snapshot.load(file_name))
+        finally:
+            os.remove(file_name)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+'''
+test_tile_grid.py
+Tests for storing tiles in the TileGrid, run with python -m pytest
+Date created: 18/10/2026
+'''
+
+import unittest
+from TileGrid import TileGrid
+
+ORIGIN = (100, 100)
+# Far enough from the origin that the grid has to grow to store the tile
+FAR = TileGrid.INITIAL_RADIUS * 3
+
+class TestTileGrid(unittest.TestCase):
+
+    def setUp(self):
+        self.grid = TileGrid(ORIGIN)
+
+    '''
+    Read a code straight from the cells the way the searches do, without any
+    bounds check
+    '''
+    def read_cell(self, x, y):
+        grid = self.grid
+        return grid.cells[y * grid.width + x - grid.offset]
+
+    '''
+    Every tile within MARGIN of a stored tile can be read straight from the
+    cells, the ones that weren't set are unknown
+    '''
+    def assert_margin_stored(self, x, y):
+        margin = TileGrid.MARGIN
+        for dy in range(-margin, margin + 1):
+            for dx in range(-margin, margin + 1):
+                self.assertNotEqual(self.grid.index(x + dx, y + dy), -1)
+                if dx or dy:
+                    self.assertEqual(self.read_cell(x + dx, y + dy), TileGrid.UNKNOWN)
+
+    '''
+    Setting tiles beyond each edge grows the grid that way, keeping every tile
+    already set where it was
+    '''
+    def test_grows_in_every_direction(self):
+        tiles = {ORIGIN: ' '}
+        self.grid.set_tile(*ORIGIN, ' ')
+        for (dx, dy), tile in zip(((-FAR, 0), (FAR, 0), (0, -FAR), (0, FAR)), ('~', 'T', 'a', '$')):
+            pos = (ORIGIN[0] + dx, ORIGIN[1] + dy)
+            self.assertEqual(self.grid.index(*pos), -1)
+            self.grid.set_tile(*pos, tile)
+            tiles[pos] = tile
+            for (x, y), tile in tiles.items():
+                self.assertEqual(self.grid.get_tile(x, y), tile)
+                self.assertEqual(self.read_cell(x, y), ord(tile))
+            self.assert_margin_stored(*pos)
+        self.assertLessEqual(self.grid.min_x, ORIGIN[0] - FAR - TileGrid.MARGIN)
+        self.assertLessEqual(self.grid.min_y, ORIGIN[1] - FAR - TileGrid.MARGIN)
+        self.assertGreaterEqual(self.grid.min_x + self.grid.width, ORIGIN[0] + FAR + TileGrid.MARGIN + 1)
+        self.assertGreaterEqual(self.grid.min_y + self.grid.height, ORIGIN[1] + FAR + TileGrid.MARGIN + 1)
+
+    '''
+    A tile set at or near the edge of the grid makes it grow so that MARGIN
+    tiles past it are stored too
+    '''
+    def test_margin_at_edge(self):
+        for distance in range(TileGrid.MARGIN + 1):
+            grid = self.grid = TileGrid(ORIGIN)
+            max_x, max_y = grid.min_x + grid.width - 1, grid.min_y + grid.height - 1
+            for x, y in ((grid.min_x + distance, ORIGIN[1]), (max_x - distance, ORIGIN[1]),
+                         (ORIGIN[0], grid.min_y + distance), (ORIGIN[0], max_y - distance)):
+                grid.set_tile(x, y, '*')
+                self.assertEqual(self.read_cell(x, y), ord('*'))
+                self.assert_margin_stored(x, y)
+
+    '''
+    Reading outside the grid gives unknown and doesn't make it grow, index
+    gives -1 for anything not stored
+    '''
+    def test_reads_outside_grid(self):
+        grid = self.grid
+        size = (grid.min_x, grid.min_y, grid.width, grid.height)
+        max_x, max_y = grid.min_x + grid.width - 1, grid.min_y + grid.height - 1
+        for x, y in ((grid.min_x - 1, ORIGIN[1]), (max_x + 1, ORIGIN[1]),
+                     (ORIGIN[0], grid.min_y - 1), (ORIGIN[0], max_y + 1)):
+            self.assertEqual(grid.index(x, y), -1)
+            self.assertEqual(grid.get_code(x, y), TileGrid.UNKNOWN)
+            self.assertEqual(grid.get_tile(x, y), '')
+        for x, y in ((grid.min_x, grid.min_y), (max_x, max_y)):
+            self.assertEqual(grid.index(x, y), (y - grid.min_y) * grid.width + x - grid.min_x)
+            self.assertEqual(grid.get_code(x, y), TileGrid.UNKNOWN)
+        self.assertEqual((grid.min_x, grid.min_y, grid.width, grid.height), size)
+
+    '''
+    A window over an area not yet stored grows the grid and writes through to
+    the cells
+    '''
+    def test_window_grows_and_writes_through(self):
+        x, y = ORIGIN[0] - FAR, ORIGIN[1] + FAR
+        window = self.grid.window(x, y, 5, 5)
+        window[2, 3] = ord('k')
+        self.assertEqual(self.grid.get_tile(x + 3, y + 2), 'k')
+        self.assert_margin_stored(x + 3, y + 2)
+
+if __name__ == '__main__':
+    unittest.main()